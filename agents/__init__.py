@@ -1,16 +1,34 @@
 """
 Agents模块
+
+子模块按需懒加载（PEP 562）：import agents 不再触发
+langchain/httpx等重量级依赖的导入，只有实际用到某个Agent类时才加载。
 """
-from .base_agent import BaseTradingAgent, LLMTradingAgent
-from agents.llm_agents import DeepSeekAgent, Qwen3Agent, GLMAgent, KimiAgent, RingAgent, StepAgent
 
-__all__ = [
-    'BaseTradingAgent',
-    'LLMTradingAgent',
-    'DeepSeekAgent',
-    'Qwen3Agent',
-    'GLMAgent',
-    'KimiAgent',
-    'RingAgent',
-    'StepAgent'
-]
+# 各导出名所在的子模块
+_SUBMODULES = {
+    'BaseTradingAgent': 'base_agent',
+    'LLMTradingAgent': 'base_agent',
+    'DeepSeekAgent': 'llm_agents',
+    'Qwen3Agent': 'llm_agents',
+    'GLMAgent': 'llm_agents',
+    'KimiAgent': 'llm_agents',
+    'RingAgent': 'llm_agents',
+    'StepAgent': 'llm_agents',
+}
+
+__all__ = list(_SUBMODULES)
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        from importlib import import_module
+        module = import_module(f".{_SUBMODULES[name]}", __name__)
+        attr = getattr(module, name)
+        globals()[name] = attr  # 缓存，后续访问不再走__getattr__
+        return attr
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(__all__)
@@ -1,15 +1,101 @@
 """
 AI交易Agent基类 - 使用LangChain新API
 """
+import hashlib
 import os
 from abc import ABC, abstractmethod
-from typing import List
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
 from langchain.agents import create_agent
 from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# 所有Agent共享的HTTP连接池：复用TCP/TLS连接，
+# 避免每个Agent每次调用都重新握手
+_HTTP_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+_shared_http_client = httpx.Client(limits=_HTTP_LIMITS)
+_shared_http_async_client = httpx.AsyncClient(limits=_HTTP_LIMITS)
+
+# 进程内决策缓存 {(model_name, context哈希): 决策结果}
+# 同一模型对相同上下文重复调用时直接复用结果，省掉一次LLM请求。
+# 注意：缓存命中会跳过整个Agent执行，工具调用（买入/卖出）也不会发生，
+# 且temperature>0时同一上下文本就应允许不同决策。
+# 因此缓存默认关闭，仅在确定性回放场景（无需重新执行交易）同时设置
+# LLM_TEMPERATURE=0 和 LLM_DECISION_CACHE=1 才会启用
+_DECISION_CACHE_OPT_IN = os.getenv("LLM_DECISION_CACHE", "0") == "1"
+_decision_cache: Dict[tuple, str] = {}
+
+# 磁盘决策缓存：跨进程复用（中断重跑同一模拟时不重复计费），
+# 同样由 LLM_DECISION_CACHE=1 开启
+_LLM_CACHE_DIR = Path(__file__).parent.parent / "data" / "llm_cache"
+
+
+def _disk_cache_path(cache_key: tuple) -> Path:
+    model_name, digest = cache_key
+    safe_model = model_name.replace('/', '_')
+    return _LLM_CACHE_DIR / f"{safe_model}_{digest}.txt"
+
+
+def _disk_cache_get(cache_key: tuple) -> Optional[str]:
+    """读磁盘决策缓存，未命中或读取失败返回None"""
+    try:
+        return _disk_cache_path(cache_key).read_text(encoding='utf-8')
+    except OSError:
+        return None
+
+
+def _disk_cache_put(cache_key: tuple, reply: str):
+    """写磁盘决策缓存，失败不影响主流程"""
+    try:
+        _LLM_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        _disk_cache_path(cache_key).write_text(reply, encoding='utf-8')
+    except OSError:
+        pass
+
+
+def _context_key(model_name: str, context: str) -> tuple:
+    """
+    生成决策缓存键
+
+    上下文先做空白归一化（合并连续空白、去首尾空白）再哈希，
+    仅排版不同、语义相同的上下文可以命中同一条缓存
+    """
+    normalized = " ".join(context.split())
+    digest = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+    return (model_name, digest)
+
+# 系统提示词（模块级常量：内容在整个模拟期间不变，
+# 作为消息前缀稳定不变时，DeepSeek/SiliconFlow/OpenAI等服务商的
+# 自动前缀缓存可以命中，降低每次调用的prefill成本和首Token延迟）
+SYSTEM_PROMPT = """你是一位专业的A股量化交易员，负责管理一个投资组合。
+
+你的任务：
+1. 分析当前市场情况和投资组合状态
+2. 基于技术分析和风险管理做出交易决策
+3. 使用提供的工具执行交易操作
+
+交易规则：
+- 初始资金100万人民币
+- 每次买入时，建议单只股票投入资金不超过总资产的30%
+- 考虑分散投资，建议持有3-5只股票
+- 注意控制风险，设置止损点
+- 买入股数必须是100的倍数（A股最小交易单位）
+- 考虑交易成本：佣金0.03%，最低5元；卖出时额外0.1%印花税
+
+决策流程建议：
+1. 首先调用 get_portfolio_status 查看当前持仓状态
+2. 调用 get_available_stocks 查看可交易股票列表
+3. 如果需要，调用 get_stock_price 查看具体股票的价格信息
+4. 根据分析决定是否买入或卖出
+5. 如果买入，使用 buy_stock 工具；如果卖出，使用 sell_stock 工具
+
+请认真分析市场，做出理性的投资决策。
+交易理由和总结请保持简洁（各50字以内），不要输出冗长的分析过程。"""
+
 
 class BaseTradingAgent(ABC):
     """交易Agent基类"""
@@ -18,12 +104,49 @@ class BaseTradingAgent(ABC):
         self.name = name
         self.model_name = model_name
         self.agent = None
+        # 决策缓存开关：默认关闭，子类确认采样确定性后才可开启
+        self._cache_enabled = False
 
     @abstractmethod
     def create_agent(self, tools: List):
         """创建Agent"""
         pass
 
+    def _cache_key(self, context: str) -> Optional[tuple]:
+        """缓存启用时返回决策缓存键，关闭时返回None（跳过上下文哈希）"""
+        if not self._cache_enabled:
+            return None
+        return _context_key(self.model_name, context)
+
+    @staticmethod
+    def _cache_lookup(cache_key: tuple) -> Optional[str]:
+        """两级决策缓存查找：内存 -> 磁盘（磁盘命中回填内存）"""
+        if cache_key in _decision_cache:
+            return _decision_cache[cache_key]
+        reply = _disk_cache_get(cache_key)
+        if reply is not None:
+            _decision_cache[cache_key] = reply
+        return reply
+
+    @staticmethod
+    def _cache_store(cache_key: tuple, reply: str):
+        """写入两级决策缓存"""
+        _decision_cache[cache_key] = reply
+        _disk_cache_put(cache_key, reply)
+
+    @staticmethod
+    def _extract_reply(result) -> str:
+        """从Agent返回结果中提取最后一条消息的内容"""
+        messages = result.get("messages", [])
+        if messages:
+            last_message = messages[-1]
+            if hasattr(last_message, 'content'):
+                return last_message.content
+            elif isinstance(last_message, dict):
+                return last_message.get('content', str(last_message))
+
+        return str(result)
+
     def make_decision(self, context: str) -> str:
         """
         做出交易决策
@@ -37,19 +160,98 @@ class BaseTradingAgent(ABC):
         if not self.agent:
             raise RuntimeError("Agent未初始化，请先调用create_agent")
 
+        cache_key = self._cache_key(context)
+        if cache_key is not None:
+            cached = self._cache_lookup(cache_key)
+            if cached is not None:
+                return cached
+
         try:
             result = self.agent.invoke({"messages": [{"role": "user", "content": context}]})
+            reply = self._extract_reply(result)
+            if cache_key is not None:
+                self._cache_store(cache_key, reply)
+            return reply
+        except Exception as e:
+            return f"Agent执行失败: {str(e)}"
 
-            # 提取最后的消息
-            messages = result.get("messages", [])
-            if messages:
-                last_message = messages[-1]
-                if hasattr(last_message, 'content'):
-                    return last_message.content
-                elif isinstance(last_message, dict):
-                    return last_message.get('content', str(last_message))
+    async def make_decision_async(self, context: str) -> str:
+        """
+        异步做出交易决策（LLM调用为I/O密集，适合并发）
 
-            return str(result)
+        Args:
+            context: 市场上下文信息
+
+        Returns:
+            str: Agent的决策和执行结果
+        """
+        if not self.agent:
+            raise RuntimeError("Agent未初始化，请先调用create_agent")
+
+        cache_key = self._cache_key(context)
+        if cache_key is not None:
+            cached = self._cache_lookup(cache_key)
+            if cached is not None:
+                return cached
+
+        try:
+            result = await self.agent.ainvoke({"messages": [{"role": "user", "content": context}]})
+            reply = self._extract_reply(result)
+            if cache_key is not None:
+                self._cache_store(cache_key, reply)
+            return reply
+        except Exception as e:
+            return f"Agent执行失败: {str(e)}"
+
+    async def make_decision_stream(self, context: str, on_token=None) -> str:
+        """
+        流式做出交易决策：边生成边消费Token，首Token即可开始处理/展示，
+        无需等待完整响应返回
+
+        Args:
+            context: 市场上下文信息
+            on_token: 可选回调，每收到一段生成内容时调用 on_token(str)
+
+        Returns:
+            str: 最终决策文本（与make_decision返回的最后一条消息内容一致）
+        """
+        if not self.agent:
+            raise RuntimeError("Agent未初始化，请先调用create_agent")
+
+        cache_key = self._cache_key(context)
+        if cache_key is not None:
+            cached = self._cache_lookup(cache_key)
+            if cached is not None:
+                if on_token:
+                    on_token(cached)
+                return cached
+
+        try:
+            # stream_mode="messages"会依次吐出每一轮的消息片段（含中间工具轮次）。
+            # 全部内容都交给on_token实时展示，但返回值/缓存值只保留最后一条消息，
+            # 与make_decision走_extract_reply得到的结果保持同一语义，
+            # 避免把多轮拼接串写进共享缓存
+            parts = []
+            last_message_id = None
+            async for chunk, _metadata in self.agent.astream(
+                {"messages": [{"role": "user", "content": context}]},
+                stream_mode="messages"
+            ):
+                content = getattr(chunk, 'content', '')
+                if content and isinstance(content, str):
+                    message_id = getattr(chunk, 'id', None)
+                    if message_id != last_message_id:
+                        # 新消息开始：丢弃上一条消息累积的内容
+                        parts = []
+                        last_message_id = message_id
+                    parts.append(content)
+                    if on_token:
+                        on_token(content)
+
+            reply = "".join(parts)
+            if cache_key is not None:
+                self._cache_store(cache_key, reply)
+            return reply
         except Exception as e:
             return f"Agent执行失败: {str(e)}"
 
@@ -59,46 +261,41 @@ class LLMTradingAgent(BaseTradingAgent):
 
     def __init__(self, name: str, model_name: str, api_key: str, base_url: str):
         super().__init__(name, model_name)
+        self.base_url = base_url
+        # 采样温度可用 LLM_TEMPERATURE 覆盖（确定性回放时设为0）
+        temperature = float(os.getenv("LLM_TEMPERATURE", "0.7"))
+        # 仅当显式开启且采样确定（temperature=0）时才启用决策缓存：
+        # temperature>0时同一上下文复用单次采样结果会改变Agent行为
+        self._cache_enabled = _DECISION_CACHE_OPT_IN and temperature == 0
         self.llm = ChatOpenAI(
             model=model_name,
             api_key=api_key,
             base_url=base_url,
-            temperature=0.7
+            temperature=temperature,
+            # 限制单轮生成长度：解码耗时与生成token数成正比，
+            # 决策只需工具调用+简短理由，无需长篇分析
+            max_tokens=600,
+            http_client=_shared_http_client,
+            http_async_client=_shared_http_async_client,
+            # 允许模型在一轮内并行发起多个工具调用（如同时查多只股票价格），
+            # 减少 思考->单工具->思考 的LLM往返次数
+            model_kwargs={"parallel_tool_calls": True},
+            # 固定缓存键：系统提示词+工具schema是稳定前缀，
+            # 支持prompt caching的服务商可跳过这段prefill（不支持的会忽略该参数）
+            extra_body={"prompt_cache_key": f"ai-trader-{model_name}"}
         )
 
     def create_agent(self, tools: List):
         """创建LangChain Agent"""
 
-        # 系统提示词
-        system_prompt = """你是一位专业的A股量化交易员，负责管理一个投资组合。
-
-你的任务：
-1. 分析当前市场情况和投资组合状态
-2. 基于技术分析和风险管理做出交易决策
-3. 使用提供的工具执行交易操作
-
-交易规则：
-- 初始资金100万人民币
-- 每次买入时，建议单只股票投入资金不超过总资产的30%
-- 考虑分散投资，建议持有3-5只股票
-- 注意控制风险，设置止损点
-- 买入股数必须是100的倍数（A股最小交易单位）
-- 考虑交易成本：佣金0.03%，最低5元；卖出时额外0.1%印花税
-
-决策流程建议：
-1. 首先调用 get_portfolio_status 查看当前持仓状态
-2. 调用 get_available_stocks 查看可交易股票列表
-3. 如果需要，调用 get_stock_price 查看具体股票的价格信息
-4. 根据分析决定是否买入或卖出
-5. 如果买入，使用 buy_stock 工具；如果卖出，使用 sell_stock 工具
-
-请认真分析市场，做出理性的投资决策。"""
+        # 按名称排序工具：工具schema顺序变化会使服务商的前缀缓存失效
+        tools = sorted(tools, key=lambda t: getattr(t, 'name', str(t)))
 
         # 使用新的create_agent API
         self.agent = create_agent(
             model=self.llm,
             tools=tools,
-            system_prompt=system_prompt
+            system_prompt=SYSTEM_PROMPT
         )
 
         return self.agent
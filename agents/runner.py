@@ -0,0 +1,90 @@
+"""
+Agent并行执行器 - 使用asyncio并发调用多个Agent
+LLM调用是I/O密集型（HTTP请求），并发执行后总耗时从各Agent耗时之和降为最大值
+"""
+import asyncio
+import threading
+import time
+from typing import Dict, List
+
+# 每个API端点的最大并发请求数（避免触发服务商限流）
+MAX_CONCURRENCY_PER_PROVIDER = 4
+
+
+class RateLimiter:
+    """
+    令牌桶限流器
+
+    相比固定sleep：只在实际请求速率超过配额时才等待，
+    调用本身耗时超过配额间隔时完全不休眠；线程安全
+    """
+
+    def __init__(self, rate: float, capacity: int = 2):
+        """
+        Args:
+            rate: 每秒补充的令牌数（即允许的平均请求速率）
+            capacity: 桶容量（允许的短时突发请求数）
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._timestamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """取走一个令牌，不足时等待到补满为止"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity,
+                               self._tokens + (now - self._timestamp) * self.rate)
+            self._timestamp = now
+
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+
+            # 令牌不足：先把本次消费记账（允许负值欠账），再等待补回，
+            # 否则等待者没扣令牌，下一个调用者会白拿刚补充的令牌
+            wait = (1 - self._tokens) / self.rate
+            self._tokens -= 1
+
+        time.sleep(wait)
+
+
+async def run_all(agents: List, context: str) -> List:
+    """
+    并发执行所有Agent的决策
+
+    Args:
+        agents: Agent列表（需已调用create_agent初始化）
+        context: 市场上下文信息
+
+    Returns:
+        List: 各Agent的决策结果（与agents顺序一致，失败项为异常对象）
+    """
+    # 按API端点分组限流，同一服务商的请求共享一个信号量
+    semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    async def _run_one(agent):
+        base_url = getattr(agent, 'base_url', '') or ''
+        if base_url not in semaphores:
+            semaphores[base_url] = asyncio.Semaphore(MAX_CONCURRENCY_PER_PROVIDER)
+        async with semaphores[base_url]:
+            return await agent.make_decision_async(context)
+
+    return await asyncio.gather(*(_run_one(agent) for agent in agents),
+                                return_exceptions=True)
+
+
+def run_agents_parallel(agents: List, context: str) -> List:
+    """
+    同步入口：并发执行所有Agent的决策
+
+    Args:
+        agents: Agent列表
+        context: 市场上下文信息
+
+    Returns:
+        List: 各Agent的决策结果
+    """
+    return asyncio.run(run_all(agents, context))
@@ -1,22 +1,37 @@
 """
 Agent状态持久化管理
 """
-import json
+import os
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Dict, List, Optional
 from datetime import datetime
 
+from core import json_io
+
+# 文件名非法字符 -> 下划线的单遍转换表（str.translate一次扫描完成，
+# 无需逐字符replace串联）；中文等合法字符原样保留
+_FILENAME_TRANSLATION = str.maketrans({c: '_' for c in ' /\\:*?"<>|'})
+
 
 class AgentStateManager:
     """Agent状态管理器 - 持久化交易记录和持仓"""
 
+    __slots__ = ('agent_name', 'data_dir', 'state_file',
+                 '_defer_depth', '_dirty', 'state')
+
     def __init__(self, agent_name: str, data_dir: Optional[Path] = None):
         self.agent_name = agent_name
         self.data_dir = data_dir or Path(__file__).parent.parent / "data" / "agent_data"
         self.data_dir.mkdir(parents=True, exist_ok=True)
 
-        # 状态文件路径
-        self.state_file = self.data_dir / f"{agent_name}_state.json"
+        # 状态文件路径（名称做单遍清洗，空格/路径分隔符等统一为下划线）
+        safe_name = agent_name.translate(_FILENAME_TRANSLATION)
+        self.state_file = self.data_dir / f"{safe_name}_state.json"
+
+        # 批量保存控制：嵌套计数 + 脏标记
+        self._defer_depth = 0
+        self._dirty = False
 
         # 加载或初始化状态
         self.state = self.load_state()
@@ -24,8 +39,7 @@ class AgentStateManager:
     def load_state(self) -> Dict:
         """加载Agent状态"""
         if self.state_file.exists():
-            with open(self.state_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return json_io.load_file(self.state_file)
         else:
             # 初始状态
             return {
@@ -41,11 +55,37 @@ class AgentStateManager:
             }
 
     def save_state(self):
-        """保存Agent状态"""
+        """保存Agent状态（批量模式下只标记脏，延迟到批量结束时写盘）"""
+        if self._defer_depth > 0:
+            self._dirty = True
+            return
+
         self.state["last_update"] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-        with open(self.state_file, 'w', encoding='utf-8') as f:
-            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        # 先写临时文件再原子替换，避免写入中断留下损坏的状态文件
+        tmp_file = self.state_file.with_suffix('.json.tmp')
+        json_io.dump_file(self.state, tmp_file, indent=2)
+        os.replace(tmp_file, self.state_file)
+
+    @contextmanager
+    def batched_saves(self):
+        """
+        批量保存上下文：期间的多次状态变更只在退出时写盘一次
+
+        用法:
+            with state_manager.batched_saves():
+                state_manager.record_trade(...)
+                state_manager.update_position(...)
+                state_manager.update_capital(...)
+        """
+        self._defer_depth += 1
+        try:
+            yield
+        finally:
+            self._defer_depth -= 1
+            if self._defer_depth == 0 and self._dirty:
+                self._dirty = False
+                self.save_state()
 
     def initialize_simulation(self, start_date: str):
         """初始化模拟交易"""
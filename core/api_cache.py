@@ -0,0 +1,59 @@
+"""
+Tushare API结果磁盘缓存
+交易日历、股票列表等元数据一天内基本不变，落盘缓存后
+重复运行/多Agent运行不再重复请求API
+"""
+import hashlib
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from core import json_io
+
+# 缓存目录
+CACHE_DIR = Path(__file__).parent.parent / "data" / "api_cache"
+
+# 默认TTL：1天（交易日历、股票列表的自然更新周期）
+DEFAULT_TTL = 24 * 3600
+
+
+def _cache_path(name: str, params: Dict) -> Path:
+    """根据接口名和参数生成缓存文件路径"""
+    digest = hashlib.sha256(
+        json_io.dumps({k: params[k] for k in sorted(params)})
+    ).hexdigest()
+    return CACHE_DIR / f"{name}_{digest[:16]}.json"
+
+
+def cached_call(name: str, params: Dict, fetch: Callable[[], Any],
+                ttl: float = DEFAULT_TTL) -> Any:
+    """
+    带磁盘缓存的API调用
+
+    Args:
+        name: 接口名（用于缓存文件命名）
+        params: 调用参数（参与缓存键计算）
+        fetch: 实际发起请求的无参函数
+        ttl: 缓存有效期（秒）
+
+    Returns:
+        缓存或新获取的结果（需可JSON序列化）；fetch返回空值时不缓存
+    """
+    path = _cache_path(name, params)
+
+    if path.exists() and time.time() - path.stat().st_mtime < ttl:
+        try:
+            return json_io.load_file(path)
+        except (ValueError, OSError):
+            pass  # 缓存损坏，走实际请求
+
+    result = fetch()
+
+    if result:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        try:
+            json_io.dump_file(result, path)
+        except (TypeError, OSError):
+            pass  # 缓存失败不影响调用结果
+
+    return result
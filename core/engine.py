@@ -1,11 +1,11 @@
 """
 交易引擎核心
 """
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from typing import Dict, List
 
 
-@dataclass
+@dataclass(slots=True)
 class Position:
     """持仓信息"""
     ts_code: str
@@ -29,7 +29,7 @@ class Position:
         return ((self.current_price - self.avg_price) / self.avg_price) * 100
 
 
-@dataclass
+@dataclass(slots=True)
 class TradeRecord:
     """交易记录"""
     date: str
@@ -56,10 +56,20 @@ class Portfolio:
         """初始化后，如果initial_capital为0，设置为当前cash"""
         if self.initial_capital == 0:
             self.initial_capital = self.cash
+        # 持仓市值缓存：持仓或价格变化时由引擎调用invalidate_market_value失效
+        self._market_value_cache = None
+
+    def invalidate_market_value(self):
+        """持仓/价格变更后使市值缓存失效"""
+        self._market_value_cache = None
 
     @property
     def total_market_value(self) -> float:
-        return sum(pos.market_value for pos in self.positions.values())
+        if self._market_value_cache is None:
+            self._market_value_cache = sum(
+                pos.market_value for pos in self.positions.values()
+            )
+        return self._market_value_cache
 
     @property
     def total_assets(self) -> float:
@@ -85,6 +95,19 @@ class TradingEngine:
 
     def __init__(self, initial_cash: float = 1000000):
         self.initial_cash = initial_cash
+        # 把类常量绑定为实例浮点数，手续费计算不再走类属性查找
+        self._commission_rate = float(self.COMMISSION_RATE)
+        self._min_commission = float(self.MIN_COMMISSION)
+        self._stamp_tax_rate = float(self.STAMP_TAX_RATE)
+        # 费率在初始化后不变：部分求值为买/卖两个闭包，
+        # 交易路径上既无is_sell分支也无费率属性查找
+        rate, min_comm, stamp = (self._commission_rate,
+                                 self._min_commission,
+                                 self._stamp_tax_rate)
+        self._buy_commission = lambda amount: max(amount * rate, min_comm)
+        self._sell_commission = (
+            lambda amount: max(amount * rate, min_comm) + amount * stamp
+        )
         self.portfolio = Portfolio(
             cash=initial_cash,
             positions={},
@@ -92,18 +115,26 @@ class TradingEngine:
             daily_values=[],
             initial_capital=initial_cash
         )
+        # 按日期索引的交易记录，查某日交易无需线性扫描全部历史
+        self._trades_by_date: Dict[str, List[TradeRecord]] = {}
+
+    def get_trades_on(self, date: str) -> List[TradeRecord]:
+        """获取某日的全部交易记录"""
+        return self._trades_by_date.get(date, [])
+
+    def _record_trade(self, trade: TradeRecord):
+        """追加交易记录并维护按日索引"""
+        self.portfolio.trade_history.append(trade)
+        self._trades_by_date.setdefault(trade.date, []).append(trade)
 
     def calculate_commission(self, amount: float, is_sell: bool = False) -> float:
-        commission = max(amount * self.COMMISSION_RATE, self.MIN_COMMISSION)
-        if is_sell:
-            stamp_tax = amount * self.STAMP_TAX_RATE
-            commission += stamp_tax
-        return commission
+        return (self._sell_commission if is_sell
+                else self._buy_commission)(amount)
 
     def buy(self, date: str, ts_code: str, name: str, price: float,
             shares: int, reason: str = "") -> bool:
         amount = price * shares
-        commission = self.calculate_commission(amount, is_sell=False)
+        commission = self._buy_commission(amount)
         total_cost = amount + commission
 
         if total_cost > self.portfolio.cash:
@@ -127,7 +158,9 @@ class TradingEngine:
                 current_price=price
             )
 
-        self.portfolio.trade_history.append(TradeRecord(
+        self.portfolio.invalidate_market_value()
+
+        self._record_trade(TradeRecord(
             date=date,
             action='buy',
             ts_code=ts_code,
@@ -151,7 +184,7 @@ class TradingEngine:
             return False
 
         amount = price * shares
-        commission = self.calculate_commission(amount, is_sell=True)
+        commission = self._sell_commission(amount)
         total_proceeds = amount - commission
 
         self.portfolio.cash += total_proceeds
@@ -162,7 +195,9 @@ class TradingEngine:
         if pos.shares == 0:
             del self.portfolio.positions[ts_code]
 
-        self.portfolio.trade_history.append(TradeRecord(
+        self.portfolio.invalidate_market_value()
+
+        self._record_trade(TradeRecord(
             date=date,
             action='sell',
             ts_code=ts_code,
@@ -177,35 +212,75 @@ class TradingEngine:
         return True
 
     def update_positions_price(self, date: str, price_data: Dict[str, float]):
+        # 单次dict查找（get）代替 in + [] 的两次查找
+        get_price = price_data.get
         for ts_code, position in self.portfolio.positions.items():
-            if ts_code in price_data:
-                position.current_price = price_data[ts_code]
+            price = get_price(ts_code)
+            if price is not None:
+                position.current_price = price
+        self.portfolio.invalidate_market_value()
 
     def record_daily_value(self, date: str):
-        self.portfolio.daily_values.append({
+        # 派生指标各算一次：属性链会让total_assets被重复推导
+        portfolio = self.portfolio
+        market_value = portfolio.total_market_value
+        total_assets = portfolio.cash + market_value
+
+        portfolio.daily_values.append({
             'date': date,
-            'cash': self.portfolio.cash,
-            'market_value': self.portfolio.total_market_value,
-            'total_assets': self.portfolio.total_assets,
-            'return_pct': self.portfolio.total_return_pct
+            'cash': portfolio.cash,
+            'market_value': market_value,
+            'total_assets': total_assets,
+            'return_pct': ((total_assets - portfolio.initial_capital)
+                           / portfolio.initial_capital * 100
+                           if portfolio.initial_capital else 0)
         })
 
     def get_portfolio_summary(self) -> Dict:
+        portfolio = self.portfolio
+        market_value = portfolio.total_market_value
+        total_assets = portfolio.cash + market_value
+
         return {
-            'cash': self.portfolio.cash,
-            'market_value': self.portfolio.total_market_value,
-            'total_assets': self.portfolio.total_assets,
-            'total_profit_loss': self.portfolio.total_profit_loss,
-            'total_return_pct': self.portfolio.total_return_pct,
-            'positions_count': len(self.portfolio.positions),
-            'trades_count': len(self.portfolio.trade_history)
+            'cash': portfolio.cash,
+            'market_value': market_value,
+            'total_assets': total_assets,
+            'total_profit_loss': total_assets - portfolio.initial_capital,
+            'total_return_pct': ((total_assets - portfolio.initial_capital)
+                                 / portfolio.initial_capital * 100
+                                 if portfolio.initial_capital else 0),
+            'positions_count': len(portfolio.positions),
+            'trades_count': len(portfolio.trade_history)
         }
 
     def export_results(self) -> Dict:
+        # 直接构造dict：asdict会递归深拷贝每个字段，字段已知且扁平时纯属浪费
         return {
             'initial_cash': self.initial_cash,
             'summary': self.get_portfolio_summary(),
-            'positions': [asdict(pos) for pos in self.portfolio.positions.values()],
-            'trade_history': [asdict(trade) for trade in self.portfolio.trade_history],
+            'positions': [
+                {
+                    'ts_code': pos.ts_code,
+                    'name': pos.name,
+                    'shares': pos.shares,
+                    'avg_price': pos.avg_price,
+                    'current_price': pos.current_price
+                }
+                for pos in self.portfolio.positions.values()
+            ],
+            'trade_history': [
+                {
+                    'date': trade.date,
+                    'action': trade.action,
+                    'ts_code': trade.ts_code,
+                    'name': trade.name,
+                    'price': trade.price,
+                    'shares': trade.shares,
+                    'amount': trade.amount,
+                    'commission': trade.commission,
+                    'reason': trade.reason
+                }
+                for trade in self.portfolio.trade_history
+            ],
             'daily_values': self.portfolio.daily_values
         }
@@ -0,0 +1,41 @@
+"""
+JSON读写辅助 - 优先使用orjson（C实现，序列化快一个数量级），未安装时回退标准库json
+文件格式保持不变（UTF-8、非ASCII原样输出），前端和已有数据文件可以继续直接读取
+"""
+import json
+from pathlib import Path
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(obj: Any, indent: int = 0) -> bytes:
+    """序列化为UTF-8字节串"""
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(obj, option=option)
+
+    return json.dumps(obj, ensure_ascii=False,
+                      indent=indent if indent else None).encode('utf-8')
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """从字节串/字符串反序列化"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dump_file(obj: Any, path: Union[str, Path], indent: int = 0):
+    """序列化并写入文件"""
+    with open(path, 'wb') as f:
+        f.write(dumps(obj, indent=indent))
+
+
+def load_file(path: Union[str, Path]) -> Any:
+    """从文件读取并反序列化"""
+    with open(path, 'rb') as f:
+        return loads(f.read())
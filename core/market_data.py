@@ -1,12 +1,43 @@
 """
 市场数据提供者 - 支持从JSON文件读取
 """
-import json
+import sys
 import tushare as ts
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from functools import lru_cache
 from typing import List, Optional, Dict
 from pathlib import Path
 
+from core import api_cache, json_io
+
+
+# (自然日, 'YYYYMMDD') 备忘：当天内直接复用已格式化的日期串
+_today_memo: tuple = (None, '')
+
+
+def _today_str() -> str:
+    """今天的YYYYMMDD字符串（按自然日备忘，热路径不反复strftime）"""
+    global _today_memo
+    today = date.today()
+    if _today_memo[0] != today:
+        _today_memo = (today, today.strftime('%Y%m%d'))
+    return _today_memo[1]
+
+
+@lru_cache(maxsize=512)
+def _load_price_file(path_str: str, mtime: float) -> Optional[Dict]:
+    """
+    解析单只股票的价格JSON文件（进程内LRU缓存）
+
+    回测中同一个文件会按不同日期反复查询，缓存解析结果后
+    每个文件每次运行只解析一次；mtime参与缓存键，文件更新后自动失效
+    """
+    try:
+        return json_io.load_file(path_str)
+    except Exception as e:
+        print(f"读取价格文件失败 {path_str}: {e}")
+        return None
+
 
 class MarketDataProvider:
     """市场数据提供者"""
@@ -14,27 +45,52 @@ class MarketDataProvider:
     def __init__(self, pro_api, data_dir: Optional[Path] = None):
         self.pro = pro_api
         self.data_dir = data_dir or Path(__file__).parent.parent / "data" / "daily_prices"
+        # 全市场单日行情缓存 {trade_date: {ts_code: 价格数据}}
+        self._daily_bulk_cache: Dict[str, Dict[str, Dict]] = {}
+        # 本地数据单日索引缓存 {trade_date: {ts_code: 价格数据}}
+        self._local_price_maps: Dict[str, Dict[str, Dict]] = {}
+        # 股票基本信息缓存 {ts_code: {name, industry, ...}}
+        self._stock_basic_map: Optional[Dict[str, Dict]] = None
+        # 单日索引落盘目录（按日合并5000+个股文件，建一次后整块复用）
+        self.index_dir = self.data_dir.parent / "price_index"
+        # 股票代码列表缓存 (目录mtime, 代码列表)
+        self._all_stocks_cache: tuple = (None, None)
+
+    # 交易日历进程内备忘 {(start_date, end_date): 交易日列表}
+    _trading_dates_memo: Dict[tuple, List[str]] = {}
 
     @staticmethod
     def get_trading_dates(pro_api, start_date: str, end_date: str) -> List[str]:
-        """获取交易日列表"""
-        try:
-            df = pro_api.trade_cal(exchange='SSE', start_date=start_date, end_date=end_date)
-            trading_dates = df[df['is_open'] == 1]['cal_date'].tolist()
-            return sorted(trading_dates)
-        except Exception as e:
-            print(f"获取交易日失败: {e}")
-            return []
+        """获取交易日列表（进程内备忘 + 磁盘缓存，一天内不重复请求）"""
+        memo_key = (start_date, end_date)
+        memo = MarketDataProvider._trading_dates_memo
+        if memo_key in memo:
+            return memo[memo_key]
+
+        def fetch():
+            try:
+                df = pro_api.trade_cal(exchange='SSE', start_date=start_date, end_date=end_date)
+                trading_dates = df[df['is_open'] == 1]['cal_date'].tolist()
+                return sorted(trading_dates)
+            except Exception as e:
+                print(f"获取交易日失败: {e}")
+                return []
+
+        dates = api_cache.cached_call(
+            'trade_cal',
+            {'start_date': start_date, 'end_date': end_date},
+            fetch
+        )
+        if dates:
+            memo[memo_key] = dates
+        return dates
 
     @staticmethod
     def get_recent_trading_dates(pro_api, n_days: int = 10) -> List[str]:
         """获取最近N个交易日"""
         # 使用最近3个月的数据，确保能获取到足够的交易日
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=90)
-
-        start_str = start_date.strftime('%Y%m%d')
-        end_str = end_date.strftime('%Y%m%d')
+        start_str = (date.today() - timedelta(days=90)).strftime('%Y%m%d')
+        end_str = _today_str()
 
         dates = MarketDataProvider.get_trading_dates(pro_api, start_str, end_str)
 
@@ -54,13 +110,16 @@ class MarketDataProvider:
         """
         file_path = self.data_dir / f"daily_prices_{ts_code}.json"
 
-        if not file_path.exists():
+        try:
+            mtime = file_path.stat().st_mtime
+        except OSError:
             return None
 
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+        data = _load_price_file(str(file_path), mtime)
+        if data is None:
+            return None
 
+        try:
             # 转换日期格式 YYYYMMDD -> YYYY-MM-DD
             date_formatted = f"{trade_date[:4]}-{trade_date[4:6]}-{trade_date[6:]}"
 
@@ -85,32 +144,125 @@ class MarketDataProvider:
             print(f"从JSON读取失败 {ts_code} {trade_date}: {e}")
             return None
 
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _fetch_stock_price(pro_api, ts_code: str, trade_date: str) -> Optional[Dict]:
+        """
+        请求并缓存股票某日价格（get_stock_price的缓存层）
+
+        历史行情不可变，同一(股票, 日期)重复查询直接命中缓存，不再请求API。
+        请求失败时异常向上抛出，lru_cache不会缓存抛异常的调用，
+        临时性网络故障不会被永久记成None
+        """
+        df = pro_api.daily(ts_code=ts_code, trade_date=trade_date)
+        if df.empty:
+            return None
+
+        row = df.iloc[0]
+        return {
+            'ts_code': row['ts_code'],
+            'date': row['trade_date'],
+            'open': float(row['open']),
+            'close': float(row['close']),
+            'high': float(row['high']),
+            'low': float(row['low']),
+            'volume': float(row['vol']) if row['vol'] else 0,
+            'change': float(row['pct_chg']) if row['pct_chg'] else 0
+        }
+
     @staticmethod
     def get_stock_price(pro_api, ts_code: str, trade_date: str) -> Optional[Dict]:
-        """获取股票某日价格（从Tushare API）"""
+        """获取股票某日价格（从Tushare API，进程内LRU缓存，失败返回None）"""
         try:
-            df = pro_api.daily(ts_code=ts_code, trade_date=trade_date)
-            if df.empty:
-                return None
-
-            row = df.iloc[0]
-            return {
-                'ts_code': row['ts_code'],
-                'date': row['trade_date'],
-                'open': float(row['open']),
-                'close': float(row['close']),
-                'high': float(row['high']),
-                'low': float(row['low']),
-                'volume': float(row['vol']) if row['vol'] else 0,
-                'change': float(row['pct_chg']) if row['pct_chg'] else 0
-            }
+            return MarketDataProvider._fetch_stock_price(pro_api, ts_code, trade_date)
         except Exception as e:
             print(f"获取股票价格失败 {ts_code} {trade_date}: {e}")
             return None
 
+    def get_local_price_map(self, trade_date: str) -> Dict[str, Dict]:
+        """
+        某交易日全部本地个股的价格映射 {ts_code: 价格数据}
+
+        首次调用会扫描所有个股JSON构建索引并落盘到 data/price_index/，
+        之后（包括后续进程）直接整块加载单个索引文件，
+        避免按日期反复打开几千个个股文件
+
+        Args:
+            trade_date: 交易日期 YYYYMMDD
+
+        Returns:
+            Dict: {ts_code: 价格数据}
+        """
+        if trade_date in self._local_price_maps:
+            return self._local_price_maps[trade_date]
+
+        index_file = self.index_dir / f"price_index_{trade_date}.json"
+        if index_file.exists():
+            try:
+                price_map = json_io.load_file(index_file)
+                self._local_price_maps[trade_date] = price_map
+                return price_map
+            except (ValueError, OSError):
+                pass  # 索引损坏，重建
+
+        # 扫描全部个股文件构建索引
+        price_map = {}
+        for ts_code in self.get_all_stocks_from_json():
+            data = self.get_stock_price_from_json(ts_code, trade_date)
+            if data:
+                price_map[ts_code] = data
+
+        if price_map:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            try:
+                json_io.dump_file(price_map, index_file)
+            except OSError:
+                pass  # 落盘失败不影响本次使用
+
+        self._local_price_maps[trade_date] = price_map
+        return price_map
+
+    def get_daily_prices(self, trade_date: str) -> Dict[str, Dict]:
+        """
+        一次API调用获取某交易日全市场行情（进程内按日期缓存）
+
+        相比逐只调用 pro.daily(ts_code=..., trade_date=...)，
+        一次 pro.daily(trade_date=...) 就能覆盖全部股票
+
+        Args:
+            trade_date: 交易日期 YYYYMMDD
+
+        Returns:
+            Dict: {ts_code: 价格数据}
+        """
+        if trade_date in self._daily_bulk_cache:
+            return self._daily_bulk_cache[trade_date]
+
+        price_map: Dict[str, Dict] = {}
+        try:
+            # fields限定服务端只返回用到的列，减少传输和解析开销
+            df = self.pro.daily(trade_date=trade_date,
+                                fields='ts_code,trade_date,open,high,low,close,vol,pct_chg')
+            for row in df.to_dict('records'):
+                price_map[row['ts_code']] = {
+                    'ts_code': row['ts_code'],
+                    'date': row['trade_date'],
+                    'open': float(row['open']),
+                    'close': float(row['close']),
+                    'high': float(row['high']),
+                    'low': float(row['low']),
+                    'volume': float(row['vol']) if row['vol'] else 0,
+                    'change': float(row['pct_chg']) if row['pct_chg'] else 0
+                }
+        except Exception as e:
+            print(f"批量获取行情失败 {trade_date}: {e}")
+
+        self._daily_bulk_cache[trade_date] = price_map
+        return price_map
+
     def get_stock_price_hybrid(self, ts_code: str, trade_date: str) -> Optional[Dict]:
         """
-        混合模式获取股票价格：优先从JSON读取，失败则从API获取
+        混合模式获取股票价格：优先从JSON读取，失败则走全市场批量行情
 
         Args:
             ts_code: 股票代码
@@ -124,57 +276,101 @@ class MarketDataProvider:
         if data:
             return data
 
-        # JSON没有，从API获取
-        return self.get_stock_price(self.pro, ts_code, trade_date)
+        # JSON没有，从当日全市场批量行情中取（首次会发起一次API调用，
+        # 之后同一天的其他股票全部命中缓存）
+        return self.get_daily_prices(trade_date).get(ts_code)
 
     def get_all_stocks_from_json(self) -> List[str]:
-        """获取所有已有JSON数据的股票代码"""
+        """获取所有已有JSON数据的股票代码
+
+        按目录mtime缓存：文件没有增删时目录mtime不变，直接复用上次
+        扫描结果，agent每步工具调用不再重扫5000+个文件名
+        """
         if not self.data_dir.exists():
             return []
 
-        stock_codes = []
-        for file_path in self.data_dir.glob("daily_prices_*.json"):
-            filename = file_path.stem
-            ts_code = filename.replace('daily_prices_', '')
-            stock_codes.append(ts_code)
+        mtime = self.data_dir.stat().st_mtime
+        if self._all_stocks_cache[0] == mtime:
+            return self._all_stocks_cache[1]
 
-        return sorted(stock_codes)
+        # 生成器直接喂给sorted，省去中间列表和逐个append
+        stocks = sorted(
+            file_path.stem.replace('daily_prices_', '')
+            for file_path in self.data_dir.glob("daily_prices_*.json")
+        )
+        self._all_stocks_cache = (mtime, stocks)
+        return stocks
 
     @staticmethod
     def get_stock_list(pro_api, limit: int = 50) -> List[Dict]:
-        """获取股票列表（按市值排序）"""
-        try:
-            today = datetime.now().strftime('%Y%m%d')
+        """获取股票列表（按市值排序，带磁盘缓存，一天内不重复请求）"""
+        today = _today_str()
+        return api_cache.cached_call(
+            'stock_list',
+            {'limit': limit, 'date': today},
+            lambda: MarketDataProvider._fetch_stock_list(pro_api, limit)
+        )
 
+    @staticmethod
+    def _fetch_stock_list(pro_api, limit: int = 50) -> List[Dict]:
+        """从Tushare拉取股票列表（按市值排序）"""
+        try:
             df_basic = pro_api.stock_basic(exchange='', list_status='L',
                                           fields='ts_code,symbol,name,area,industry')
 
-            df_market = pro_api.daily_basic(trade_date=today,
-                                           fields='ts_code,total_mv,turnover_rate,pe_ttm')
-
-            if df_market.empty:
-                yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y%m%d')
-                df_market = pro_api.daily_basic(trade_date=yesterday,
+            # 先查交易日历定位最近交易日，通常一次daily_basic就命中，
+            # 替代"今天失败再试昨天"的两次串行往返；
+            # 数据尚未发布时继续向前找更早的交易日
+            recent_dates = MarketDataProvider.get_recent_trading_dates(pro_api, 5)
+            if not recent_dates:
+                recent_dates = [(date.today() - timedelta(days=1)).strftime('%Y%m%d'),
+                                _today_str()]
+
+            df_market = None
+            for trade_date in reversed(recent_dates):
+                df_market = pro_api.daily_basic(trade_date=trade_date,
                                                fields='ts_code,total_mv,turnover_rate,pe_ttm')
+                if not df_market.empty:
+                    break
 
             df = df_basic.merge(df_market, on='ts_code', how='inner')
             df = df.dropna(subset=['total_mv'])
             df = df.sort_values('total_mv', ascending=False).head(limit)
 
-            stocks = []
-            for _, row in df.iterrows():
-                stocks.append({
-                    'ts_code': row['ts_code'],
+            # to_dict('records')一次性物化所有行，避免iterrows逐行构造Series；
+            # ts_code/industry高度重复，intern后相同字符串共享存储、比较走指针
+            stocks = [
+                {
+                    'ts_code': sys.intern(row['ts_code']),
                     'name': row['name'],
-                    'industry': row['industry'] if row['industry'] else '未知',
+                    # industry缺失时pandas给的是NaN（float），intern(NaN)会抛TypeError
+                    'industry': (sys.intern(row['industry'])
+                                 if isinstance(row['industry'], str) and row['industry']
+                                 else '未知'),
                     'market_value': float(row['total_mv']) if row['total_mv'] else 0
-                })
+                }
+                for row in df.to_dict('records')
+            ]
 
             return stocks
         except Exception as e:
             print(f"获取股票列表失败: {e}")
             return []
 
+    def _get_stock_basic_map(self) -> Dict[str, Dict]:
+        """获取股票基本信息映射 {ts_code: 基本信息}（每进程只请求一次）"""
+        if self._stock_basic_map is None:
+            df_basic = self.pro.stock_basic(
+                exchange='',
+                list_status='L',
+                fields='ts_code,symbol,name,area,industry'
+            )
+            self._stock_basic_map = {
+                sys.intern(row['ts_code']): row
+                for row in df_basic.to_dict('records')
+            }
+        return self._stock_basic_map
+
     def get_all_stocks_with_json(self) -> List[Dict]:
         """获取所有已有JSON数据的股票（包含基本信息）"""
         stock_codes = self.get_all_stocks_from_json()
@@ -183,18 +379,13 @@ class MarketDataProvider:
             return []
 
         try:
-            # 从API获取基本信息
-            df_basic = self.pro.stock_basic(
-                exchange='',
-                list_status='L',
-                fields='ts_code,symbol,name,area,industry'
-            )
+            # 基本信息只拉取一次，之后按代码做O(1)查找
+            basic_map = self._get_stock_basic_map()
 
             stocks = []
             for ts_code in stock_codes:
-                row = df_basic[df_basic['ts_code'] == ts_code]
-                if not row.empty:
-                    row = row.iloc[0]
+                row = basic_map.get(ts_code)
+                if row:
                     stocks.append({
                         'ts_code': ts_code,
                         'name': row['name'],
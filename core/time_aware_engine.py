@@ -27,6 +27,9 @@ class TimeAwareTradingEngine(TradingEngine):
         # 当前模拟日期（AI只能看到这个日期及之前的数据）
         self.current_simulation_date = None
 
+        # 持仓估值备忘 (缓存键, 市值)：同一天内无新交易时直接复用
+        self._positions_value_memo = (None, 0.0)
+
     def initialize_simulation(self, start_date: str):
         """
         初始化模拟交易
@@ -45,6 +48,9 @@ class TimeAwareTradingEngine(TradingEngine):
             daily_values=[],
             initial_capital=self.initial_cash
         )
+        self._trades_by_date = {}
+        # 估值备忘一并重置：上一轮模拟的(日期, 交易数)键在新组合下会撞上旧市值
+        self._positions_value_memo = (None, 0.0)
 
     def advance_to_date(self, new_date: str):
         """
@@ -94,27 +100,29 @@ class TimeAwareTradingEngine(TradingEngine):
         success = super().buy(date, ts_code, name, price, shares, reason)
 
         if success:
-            # 记录交易
-            self.state_manager.record_trade({
-                "action": "buy",
-                "ts_code": ts_code,
-                "name": name,
-                "price": price,
-                "shares": shares,
-                "reason": reason
-            })
-
-            # 更新持仓
-            position = self.portfolio.positions.get(ts_code)
-            if position:
-                self.state_manager.update_position(
-                    ts_code,
-                    position.shares,
-                    position.avg_price
-                )
-
-            # 更新资金
-            self.state_manager.update_capital(self.portfolio.cash)
+            # 批量保存：交易记录、持仓、资金三次变更只写盘一次
+            with self.state_manager.batched_saves():
+                # 记录交易
+                self.state_manager.record_trade({
+                    "action": "buy",
+                    "ts_code": ts_code,
+                    "name": name,
+                    "price": price,
+                    "shares": shares,
+                    "reason": reason
+                })
+
+                # 更新持仓
+                position = self.portfolio.positions.get(ts_code)
+                if position:
+                    self.state_manager.update_position(
+                        ts_code,
+                        position.shares,
+                        position.avg_price
+                    )
+
+                # 更新资金
+                self.state_manager.update_capital(self.portfolio.cash)
 
         return success
 
@@ -142,39 +150,50 @@ class TimeAwareTradingEngine(TradingEngine):
         success = super().sell(date, ts_code, name, price, shares, reason)
 
         if success:
-            # 记录交易
-            self.state_manager.record_trade({
-                "action": "sell",
-                "ts_code": ts_code,
-                "name": name,
-                "price": price,
-                "shares": shares,
-                "reason": reason
-            })
-
-            # 更新持仓
-            position = self.portfolio.positions.get(ts_code)
-            if position:
-                self.state_manager.update_position(
-                    ts_code,
-                    position.shares,
-                    position.avg_price
-                )
-            else:
-                # 已清仓
-                self.state_manager.update_position(ts_code, 0, 0)
-
-            # 更新资金
-            self.state_manager.update_capital(self.portfolio.cash)
+            # 批量保存：交易记录、持仓、资金三次变更只写盘一次
+            with self.state_manager.batched_saves():
+                # 记录交易
+                self.state_manager.record_trade({
+                    "action": "sell",
+                    "ts_code": ts_code,
+                    "name": name,
+                    "price": price,
+                    "shares": shares,
+                    "reason": reason
+                })
+
+                # 更新持仓
+                position = self.portfolio.positions.get(ts_code)
+                if position:
+                    self.state_manager.update_position(
+                        ts_code,
+                        position.shares,
+                        position.avg_price
+                    )
+                else:
+                    # 已清仓
+                    self.state_manager.update_position(ts_code, 0, 0)
+
+                # 更新资金
+                self.state_manager.update_capital(self.portfolio.cash)
 
         return success
 
-    def _save_daily_snapshot(self):
-        """保存每日快照"""
-        # 计算持仓市值
+    def _positions_value(self) -> float:
+        """
+        按当前模拟日期收盘价计算持仓总市值
+
+        个股价格查询命中market_data的文件解析缓存，单次估值为纯dict查找；
+        快照和汇总共用此方法，不再各自重复循环；
+        同一天内持仓未变（交易数相同）时直接返回备忘值
+        """
+        memo_key = (self.current_simulation_date,
+                    len(self.portfolio.trade_history))
+        if self._positions_value_memo[0] == memo_key:
+            return self._positions_value_memo[1]
+
         positions_value = 0
         for ts_code, position in self.portfolio.positions.items():
-            # 获取当日收盘价
             price_data = self.market_data.get_stock_price_from_json(
                 ts_code,
                 self.current_simulation_date
@@ -182,6 +201,12 @@ class TimeAwareTradingEngine(TradingEngine):
             if price_data:
                 positions_value += position.shares * price_data['close']
 
+        self._positions_value_memo = (memo_key, positions_value)
+        return positions_value
+
+    def _save_daily_snapshot(self):
+        """保存每日快照"""
+        positions_value = self._positions_value()
         total_value = self.portfolio.cash + positions_value
 
         # 保存快照
@@ -189,16 +214,7 @@ class TimeAwareTradingEngine(TradingEngine):
 
     def get_summary(self) -> Dict:
         """获取汇总信息"""
-        # 计算当前市值
-        positions_value = 0
-        for ts_code, position in self.portfolio.positions.items():
-            price_data = self.market_data.get_stock_price_from_json(
-                ts_code,
-                self.current_simulation_date
-            )
-            if price_data:
-                positions_value += position.shares * price_data['close']
-
+        positions_value = self._positions_value()
         total_value = self.portfolio.cash + positions_value
 
         return {
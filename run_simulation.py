@@ -11,9 +11,14 @@ from core.market_data import MarketDataProvider
 from core.time_aware_engine import TimeAwareTradingEngine
 from tools.trading_tools import TradingToolkit
 from agents.llm_agents import DeepSeekAgent, GLMAgent, KimiAgent, RingAgent
+from agents.runner import RateLimiter
 
 load_dotenv()
 
+# 决策请求限流：平均1次/秒（与原固定sleep等价的配额），
+# 但决策本身耗时超过1秒时不再额外休眠
+decision_limiter = RateLimiter(rate=1.0, capacity=2)
+
 # 初始化Tushare
 TUSHARE_API_KEY = os.getenv("TUSHARE_API_KEY")
 ts.set_token(TUSHARE_API_KEY)
@@ -30,6 +35,41 @@ def get_recent_trading_dates(n_days: int = 10):
     return dates[-n_days:]
 
 
+# 每日决策提示词模板（模块级常量：静态部分只构建一次，
+# 每天仅做占位符填充；固定的前缀也有利于服务商前缀缓存命中）
+DAILY_PROMPT_TEMPLATE = """
+今天是 {year}年{month}月{day}日。
+
+你的任务是基于今天及之前的市场数据做出交易决策。
+
+重要提醒:
+1. 你只能看到今天（{current_date}）及之前的数据
+2. 不能看到未来的数据
+3. 初始资金: 1,000,000 RMB
+
+当前投资组合状态（无需再调用 get_portfolio_status）:
+- 现金: {cash:,.2f} RMB
+- 持仓市值: {positions_value:,.2f} RMB
+- 总资产: {total_value:,.2f} RMB
+- 收益率: {return_rate:.2f}%
+{positions_desc}
+
+可用工具说明:
+- get_portfolio_status: 查看当前持仓、资金、收益等信息（上方已提供，一般无需调用）
+- get_available_stocks: 获取所有可交易股票代码列表（5000+只）
+- search_stocks: 按条件筛选股票（涨跌幅、价格区间、成交量等）
+- get_stock_price: 获取指定股票的详细价格信息
+- buy_stock: 买入股票
+- sell_stock: 卖出股票
+
+交易策略建议:
+1. 使用 search_stocks 筛选出符合条件的股票（如涨幅较大、跌幅较大、成交活跃等）
+2. 对感兴趣的股票使用 get_stock_price 获取详细信息
+3. 根据分析结果做出买入或卖出决策
+
+请分析市场并做出交易决策。如果发现好的投资机会就买入，如果持仓需要调整就卖出。
+"""
+
 # Agent配置
 AVAILABLE_AGENTS = {
     'deepseek': {
@@ -125,6 +165,9 @@ def simulate_trading(agent_key: str):
         engine.advance_to_date(current_date)
         toolkit.update_current_date(current_date)
 
+        # 预取当日全量价格：工具层整天直接命中缓存，不再逐只读文件
+        toolkit.preload_prices(market_data.get_local_price_map(current_date))
+
         # 显示当前状态
         summary = engine.get_summary()
         print(f"\n当前状态:")
@@ -137,32 +180,30 @@ def simulate_trading(agent_key: str):
         print(f"\n{display_name} 正在分析市场...")
 
         # 创建提示词
-        prompt = f"""
-今天是 {current_date[:4]}年{current_date[4:6]}月{current_date[6:]}日。
-
-你的任务是基于今天及之前的市场数据做出交易决策。
-
-重要提醒:
-1. 你只能看到今天（{current_date}）及之前的数据
-2. 不能看到未来的数据
-3. 初始资金: 1,000,000 RMB
-
-可用工具说明:
-- get_portfolio_status: 查看当前持仓、资金、收益等信息
-- get_available_stocks: 获取所有可交易股票代码列表（5000+只）
-- search_stocks: 按条件筛选股票（涨跌幅、价格区间、成交量等）
-- get_stock_price: 获取指定股票的详细价格信息
-- buy_stock: 买入股票
-- sell_stock: 卖出股票
-
-交易策略建议:
-1. 先查看当前持仓状态 (get_portfolio_status)
-2. 使用 search_stocks 筛选出符合条件的股票（如涨幅较大、跌幅较大、成交活跃等）
-3. 对感兴趣的股票使用 get_stock_price 获取详细信息
-4. 根据分析结果做出买入或卖出决策
-
-请分析市场并做出交易决策。如果发现好的投资机会就买入，如果持仓需要调整就卖出。
-"""
+        # 把持仓状态直接写进提示词，省掉Agent第一轮的get_portfolio_status
+        # 工具调用（每省一轮工具调用就少一次LLM往返）
+        positions_desc = ""
+        if engine.portfolio.positions:
+            position_lines = []
+            for ts_code, position in engine.portfolio.positions.items():
+                position_lines.append(
+                    f"  - {ts_code}: {position.shares}股, 成本 {position.avg_price:.2f} RMB"
+                )
+            positions_desc = "当前持仓:\n" + "\n".join(position_lines)
+        else:
+            positions_desc = "当前无持仓"
+
+        prompt = DAILY_PROMPT_TEMPLATE.format(
+            year=current_date[:4],
+            month=current_date[4:6],
+            day=current_date[6:],
+            current_date=current_date,
+            cash=summary['current_cash'],
+            positions_value=summary['positions_value'],
+            total_value=summary['total_value'],
+            return_rate=summary['return_rate'],
+            positions_desc=positions_desc
+        )
 
         try:
             # Agent执行决策
@@ -175,8 +216,8 @@ def simulate_trading(agent_key: str):
             import traceback
             traceback.print_exc()
 
-        # 显示今日交易
-        trades_today = [t for t in engine.portfolio.trade_history if t.date == current_date]
+        # 显示今日交易（按日索引直接取，不扫描全部历史）
+        trades_today = engine.get_trades_on(current_date)
         if trades_today:
             print(f"\n今日交易记录:")
             for trade in trades_today:
@@ -188,8 +229,8 @@ def simulate_trading(agent_key: str):
         else:
             print(f"\n今日无交易")
 
-        # 小延迟（避免API限流）
-        time.sleep(1)
+        # 限流（避免API限流）：令牌桶按实际速率决定是否等待
+        decision_limiter.acquire()
 
     # 模拟结束
     print("\n" + "=" * 80)
@@ -205,11 +246,12 @@ def simulate_trading(agent_key: str):
     print(f"  总收益率: {final_summary['return_rate']:.2f}%")
     print(f"  交易次数: {final_summary['trades_count']}")
 
-    # 显示持仓
+    # 显示持仓（最后一日价格走批量索引，一次加载覆盖全部持仓）
     if engine.portfolio.positions:
+        final_prices = market_data.get_local_price_map(trading_dates[-1])
         print(f"\n最终持仓:")
         for ts_code, position in engine.portfolio.positions.items():
-            current_price_data = market_data.get_stock_price_from_json(ts_code, trading_dates[-1])
+            current_price_data = final_prices.get(ts_code)
             if current_price_data:
                 current_value = position.shares * current_price_data['close']
                 profit = current_value - (position.shares * position.avg_price)
@@ -224,12 +266,14 @@ def simulate_trading(agent_key: str):
     print(f"\n状态文件已保存: data/agent_data/{agent_name}_state.json")
 
 
-def simulate_all_agents(agent_keys=None):
+def simulate_all_agents(agent_keys=None, parallel=False, max_workers=None):
     """
     运行多个Agent的模拟
 
     Args:
         agent_keys: Agent key列表，如果为None则运行所有enabled的Agent
+        parallel: 是否并行运行各Agent（LLM调用以HTTP等待为主，线程并行可重叠I/O）
+        max_workers: 并行线程数上限，默认等于Agent数量
     """
     if agent_keys is None:
         # 运行所有enabled的Agent
@@ -247,20 +291,47 @@ def simulate_all_agents(agent_keys=None):
     print("Agent list:", ", ".join([AVAILABLE_AGENTS[k]['display_name'] for k in agent_keys]))
     print()
 
-    for i, agent_key in enumerate(agent_keys, 1):
-        print(f"\n{'#' * 80}")
-        print(f"# Agent {i}/{len(agent_keys)}")
-        print(f"{'#' * 80}\n")
+    # 预热每日价格索引：market_data是进程级单例，索引构建一次后
+    # 所有Agent（含并行模式）直接复用，不会重复扫描个股文件
+    print("Prewarming daily price maps...")
+    for date in get_recent_trading_dates(10):
+        market_data.get_local_price_map(date)
+
+    if parallel and len(agent_keys) > 1:
+        # 各Agent的引擎/状态文件相互独立，耗时主要是等LLM响应，
+        # 用线程池让多个Agent的HTTP等待相互重叠。
+        # 默认并发上限4：当前所有Agent都走SiliconFlow，无限制并发
+        # 容易触发限流反而变慢，可用AGENT_MAX_WORKERS调整
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        default_workers = int(os.getenv('AGENT_MAX_WORKERS', '4'))
+        workers = max_workers or min(len(agent_keys), default_workers)
+        print(f"Running {len(agent_keys)} agents in parallel ({workers} workers)")
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(simulate_trading, key): key
+                       for key in agent_keys}
+            for future in as_completed(futures):
+                agent_key = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Agent '{agent_key}' failed: {e}")
+    else:
+        for i, agent_key in enumerate(agent_keys, 1):
+            print(f"\n{'#' * 80}")
+            print(f"# Agent {i}/{len(agent_keys)}")
+            print(f"{'#' * 80}\n")
 
-        simulate_trading(agent_key)
+            simulate_trading(agent_key)
 
-        # Agent之间的间隔
-        if i < len(agent_keys):
-            print("\n" + "-" * 80)
-            print("Waiting 5 seconds before next agent...")
-            print("-" * 80)
-            import time
-            time.sleep(5)
+            # Agent之间的间隔
+            if i < len(agent_keys):
+                print("\n" + "-" * 80)
+                print("Waiting 5 seconds before next agent...")
+                print("-" * 80)
+                import time
+                time.sleep(5)
 
     print("\n" + "=" * 80)
     print("All agent simulations completed!")
@@ -277,6 +348,8 @@ if __name__ == "__main__":
     parser.add_argument('--agent', type=str, help='运行指定的Agent (deepseek/gpt4/claude/qwen3)')
     parser.add_argument('--agents', type=str, help='运行多个Agent，逗号分隔 (例: deepseek,gpt4)')
     parser.add_argument('--all', action='store_true', help='运行所有已启用的Agent')
+    parser.add_argument('--parallel', action='store_true', help='并行运行多个Agent')
+    parser.add_argument('--workers', type=int, default=None, help='并行线程数上限')
     parser.add_argument('--list', action='store_true', help='列出所有可用的Agent')
 
     args = parser.parse_args()
@@ -295,10 +368,10 @@ if __name__ == "__main__":
         print("  python run_simulation.py --agents deepseek,gpt4")
         print("  python run_simulation.py --all")
     elif args.all:
-        simulate_all_agents()
+        simulate_all_agents(parallel=args.parallel, max_workers=args.workers)
     elif args.agents:
         agent_keys = [k.strip() for k in args.agents.split(',')]
-        simulate_all_agents(agent_keys)
+        simulate_all_agents(agent_keys, parallel=args.parallel, max_workers=args.workers)
     elif args.agent:
         simulate_trading(args.agent)
     else:
@@ -0,0 +1,62 @@
+"""
+脚本侧的Tushare结果文件缓存
+按(接口名, 参数)哈希落盘，TTL内直接复用，避免重复网络请求
+（core.api_cache 的脚本版：scripts 独立运行，不引入 core 包依赖）
+"""
+import hashlib
+import json
+import time
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CACHE_DIR = Path(__file__).parent.parent / ".cache" / "tushare"
+
+# 默认24小时：日线/列表类数据当天内不会变化
+DEFAULT_TTL = 24 * 3600
+
+
+def _cache_path(name: str, params: dict) -> Path:
+    """按接口名+参数哈希生成缓存文件路径"""
+    key = json.dumps(params, sort_keys=True, ensure_ascii=False)
+    digest = hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+    return CACHE_DIR / f"{name}_{digest}.json"
+
+
+def cached_call(name: str, params: dict, fetch, ttl: float = DEFAULT_TTL):
+    """
+    TTL内命中缓存直接返回，否则调用fetch()并落盘
+
+    Args:
+        name: 接口名（用于缓存文件命名）
+        params: 请求参数（参与缓存键）
+        fetch: 无参回调，缓存未命中时执行实际请求，返回可JSON序列化结果
+        ttl: 缓存有效期（秒）
+
+    Returns:
+        缓存或新获取的结果；空结果不缓存
+    """
+    path = _cache_path(name, params)
+
+    if path.exists() and time.time() - path.stat().st_mtime < ttl:
+        try:
+            raw = path.read_bytes()
+            return orjson.loads(raw) if orjson is not None else json.loads(raw)
+        except (ValueError, OSError):
+            # 缓存损坏则当作未命中，重新获取
+            pass
+
+    result = fetch()
+
+    if result:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        if orjson is not None:
+            path.write_bytes(orjson.dumps(result))
+        else:
+            path.write_text(json.dumps(result, ensure_ascii=False),
+                            encoding='utf-8')
+
+    return result
@@ -0,0 +1,21 @@
+"""
+Tushare Pro 客户端单例
+进程内只初始化一次 token 和 pro_api 句柄，各脚本共享同一个实例，
+复用底层HTTP keep-alive连接
+"""
+import os
+import tushare as ts
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_pro = None
+
+
+def get_pro():
+    """获取进程内共享的 Tushare Pro 接口（首次调用时设置token并创建）"""
+    global _pro
+    if _pro is None:
+        ts.set_token(os.getenv("TUSHARE_API_KEY"))
+        _pro = ts.pro_api()
+    return _pro
@@ -13,12 +13,35 @@ data_dest = root_dir / "docs" / "data"
 # 确保目标目录存在
 data_dest.mkdir(parents=True, exist_ok=True)
 
-# 复制所有agent数据文件
+def sync_file(src, dest):
+    """
+    同步单个文件：优先硬链接（零拷贝，状态文件通过原子替换更新，
+    新状态会换新inode，不会透过旧链接被改写），跨设备等场景回退为复制
+    """
+    try:
+        dest.unlink(missing_ok=True)
+        os.link(src, dest)
+    except OSError:
+        shutil.copy2(src, dest)
+
+
+# 同步所有agent数据文件（目标文件已是最新时跳过）
 if data_source.exists():
     for file in data_source.glob("*_state.json"):
         dest_file = data_dest / file.name
-        shutil.copy2(file, dest_file)
-        print(f"[OK] Copy: {file.name} -> {dest_file}")
+
+        if dest_file.exists():
+            src_stat = file.stat()
+            dest_stat = dest_file.stat()
+            # 同一inode（已硬链接）或 mtime/大小一致（copy2保留mtime）则未变
+            if (dest_stat.st_ino == src_stat.st_ino
+                    or (dest_stat.st_mtime >= src_stat.st_mtime
+                        and dest_stat.st_size == src_stat.st_size)):
+                print(f"[SKIP] Up-to-date: {file.name}")
+                continue
+
+        sync_file(file, dest_file)
+        print(f"[OK] Sync: {file.name} -> {dest_file}")
     print(f"\n[SUCCESS] Data copied to {data_dest}")
 else:
     print(f"[ERROR] Source directory not found: {data_source}")
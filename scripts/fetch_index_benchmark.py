@@ -2,18 +2,28 @@
 获取上证指数基准数据
 用于对比AI交易表现
 """
-import os
 import json
-import tushare as ts
 from dotenv import load_dotenv
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from _tushare_client import get_pro
+
 load_dotenv()
 
-# 初始化Tushare
-TUSHARE_API_KEY = os.getenv("TUSHARE_API_KEY")
-ts.set_token(TUSHARE_API_KEY)
-pro = ts.pro_api()
+
+def dumps_json(obj) -> bytes:
+    """序列化为UTF-8字节串（优先orjson，未安装回退标准库）"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+
+# 共享的Tushare客户端
+pro = get_pro()
 
 def get_index_data(start_date='20251015', end_date='20251027'):
     """
@@ -46,7 +56,7 @@ def get_index_data(start_date='20251015', end_date='20251027'):
         'daily_data': []
     }
 
-    for _, row in df.iterrows():
+    for row in df.to_dict('records'):
         daily_return = ((row['close'] - first_close) / first_close) * 100
         benchmark_data['daily_data'].append({
             'date': row['trade_date'],
@@ -71,8 +81,11 @@ def save_index_data():
 
     output_file = data_dir / "index_benchmark.json"
 
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(index_data, f, indent=2, ensure_ascii=False)
+    # 只序列化一次，两个目标文件直接写同一份字节串
+    payload = dumps_json(index_data)
+
+    with open(output_file, 'wb') as f:
+        f.write(payload)
 
     print(f"\n[SUCCESS] Index benchmark data saved to: {output_file}")
     print(f"  Date range: {index_data['start_date']} - {index_data['end_date']}")
@@ -85,8 +98,8 @@ def save_index_data():
     docs_dir.mkdir(parents=True, exist_ok=True)
     docs_file = docs_dir / "index_benchmark.json"
 
-    with open(docs_file, 'w', encoding='utf-8') as f:
-        json.dump(index_data, f, indent=2, ensure_ascii=False)
+    with open(docs_file, 'wb') as f:
+        f.write(payload)
 
     print(f"[SUCCESS] Also copied to: {docs_file}")
 
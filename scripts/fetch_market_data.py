@@ -2,30 +2,44 @@
 A股市场数据获取脚本
 使用Tushare API获取市场数据并保存为JSON格式
 """
-import tushare as ts
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+import numpy as np
 import pandas as pd
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from _cache import cached_call
+from _tushare_client import get_pro
+
 load_dotenv()
 
-TUSHARE_API_KEY = os.getenv("TUSHARE_API_KEY")
-ts.set_token(TUSHARE_API_KEY)
-pro = ts.pro_api()
+pro = get_pro()
 
 # 输出目录
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), '..', 'docs', 'data')
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+
+def dumps_json(obj) -> bytes:
+    """序列化为UTF-8字节串（优先orjson，未安装回退标准库）"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+
 def get_date_range(days=365):
     """获取日期范围"""
     end_date = datetime.now()
     start_date = end_date - timedelta(days=days)
     return start_date.strftime('%Y%m%d'), end_date.strftime('%Y%m%d')
 
-def fetch_index_daily(ts_code='000001.SH', days=365):
+def fetch_index_daily(ts_code='000001.SH', days=365, date_range=None):
     """
     获取指数日线数据
     ts_code: 指数代码
@@ -33,17 +47,18 @@ def fetch_index_daily(ts_code='000001.SH', days=365):
         - 399001.SZ: 深证成指
         - 399006.SZ: 创业板指
         - 000300.SH: 沪深300
+    date_range: (start_date, end_date)元组，调用方已算好则直接复用
     """
-    start_date, end_date = get_date_range(days)
+    start_date, end_date = date_range if date_range else get_date_range(days)
 
-    try:
-        df = pro.index_daily(ts_code=ts_code, start_date=start_date, end_date=end_date)
+    def _fetch():
+        df = pro.index_daily(ts_code=ts_code, start_date=start_date, end_date=end_date,
+                             fields='trade_date,open,high,low,close,vol,pct_chg')
         df = df.sort_values('trade_date')
 
-        # 转换为前端需要的格式
-        data = []
-        for _, row in df.iterrows():
-            data.append({
+        # 转换为前端需要的格式（to_dict('records')避免iterrows逐行装箱）
+        return [
+            {
                 'date': row['trade_date'],
                 'close': float(row['close']),
                 'open': float(row['open']),
@@ -51,9 +66,17 @@ def fetch_index_daily(ts_code='000001.SH', days=365):
                 'low': float(row['low']),
                 'volume': float(row['vol']),
                 'change': float(row['pct_chg']) if pd.notna(row['pct_chg']) else 0
-            })
+            }
+            for row in df.to_dict('records')
+        ]
 
-        return data
+    try:
+        # 文件缓存：end_date随当天变化，缓存键每天自动失效
+        return cached_call(
+            'index_daily',
+            {'ts_code': ts_code, 'start_date': start_date, 'end_date': end_date},
+            _fetch
+        )
     except Exception as e:
         print(f"获取指数数据失败: {e}")
         return []
@@ -63,51 +86,66 @@ def fetch_top_stocks(limit=10):
     try:
         # 获取今日交易日期
         today = datetime.now().strftime('%Y%m%d')
+        return cached_call(
+            'top_stocks',
+            {'trade_date': today, 'limit': limit},
+            lambda: _fetch_top_stocks(limit)
+        )
+    except Exception as e:
+        print(f"获取股票列表失败: {e}")
+        return []
 
-        # 获取股票基本信息
-        df = pro.stock_basic(exchange='', list_status='L', fields='ts_code,symbol,name,area,industry,market,list_date')
 
-        # 获取最新市值数据
-        df_market = pro.daily_basic(trade_date=today, fields='ts_code,total_mv,circ_mv,pe_ttm,pb,ps_ttm')
+def _fetch_top_stocks(limit):
+    """实际请求市值前N的股票（fetch_top_stocks的缓存未命中路径）"""
+    today = datetime.now().strftime('%Y%m%d')
 
-        if df_market.empty:
-            # 如果今天没有数据，尝试获取前一个交易日
-            yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y%m%d')
-            df_market = pro.daily_basic(trade_date=yesterday, fields='ts_code,total_mv,circ_mv,pe_ttm,pb,ps_ttm')
+    # 获取股票基本信息
+    df = pro.stock_basic(exchange='', list_status='L', fields='ts_code,symbol,name,area,industry,market,list_date')
 
-        # 合并数据
-        df = df.merge(df_market, on='ts_code', how='inner')
+    # 获取最新市值数据
+    df_market = pro.daily_basic(trade_date=today, fields='ts_code,total_mv,circ_mv,pe_ttm,pb,ps_ttm')
 
-        # 按总市值排序
-        df = df.sort_values('total_mv', ascending=False).head(limit)
+    if df_market.empty:
+        # 如果今天没有数据，尝试获取前一个交易日
+        yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y%m%d')
+        df_market = pro.daily_basic(trade_date=yesterday, fields='ts_code,total_mv,circ_mv,pe_ttm,pb,ps_ttm')
 
-        stocks = []
-        for _, row in df.iterrows():
-            stocks.append({
-                'ts_code': row['ts_code'],
-                'name': row['name'],
-                'industry': row['industry'] if pd.notna(row['industry']) else '未知',
-                'market_value': float(row['total_mv']) if pd.notna(row['total_mv']) else 0,
-                'pe_ttm': float(row['pe_ttm']) if pd.notna(row['pe_ttm']) else 0,
-                'pb': float(row['pb']) if pd.notna(row['pb']) else 0
-            })
+    # 合并数据
+    df = df.merge(df_market, on='ts_code', how='inner')
 
-        return stocks
-    except Exception as e:
-        print(f"获取股票列表失败: {e}")
-        return []
+    # 按总市值排序
+    df = df.sort_values('total_mv', ascending=False).head(limit)
+
+    # NaN整列填充一次，行提取走to_dict('records')，不再iterrows逐行装箱
+    df['industry'] = df['industry'].fillna('未知')
+    df[['total_mv', 'pe_ttm', 'pb']] = df[['total_mv', 'pe_ttm', 'pb']].fillna(0)
+
+    stocks = [
+        {
+            'ts_code': row['ts_code'],
+            'name': row['name'],
+            'industry': row['industry'],
+            'market_value': float(row['total_mv']),
+            'pe_ttm': float(row['pe_ttm']),
+            'pb': float(row['pb'])
+        }
+        for row in df.to_dict('records')
+    ]
 
-def fetch_stock_history(ts_code, days=365):
+    return stocks
+
+def fetch_stock_history(ts_code, days=365, date_range=None):
     """获取股票历史数据"""
-    start_date, end_date = get_date_range(days)
+    start_date, end_date = date_range if date_range else get_date_range(days)
 
-    try:
-        df = pro.daily(ts_code=ts_code, start_date=start_date, end_date=end_date)
+    def _fetch():
+        df = pro.daily(ts_code=ts_code, start_date=start_date, end_date=end_date,
+                       fields='trade_date,open,high,low,close,vol,pct_chg')
         df = df.sort_values('trade_date')
 
-        data = []
-        for _, row in df.iterrows():
-            data.append({
+        return [
+            {
                 'date': row['trade_date'],
                 'close': float(row['close']),
                 'open': float(row['open']),
@@ -115,9 +153,16 @@ def fetch_stock_history(ts_code, days=365):
                 'low': float(row['low']),
                 'volume': float(row['vol']) if pd.notna(row['vol']) else 0,
                 'change': float(row['pct_chg']) if pd.notna(row['pct_chg']) else 0
-            })
+            }
+            for row in df.to_dict('records')
+        ]
 
-        return data
+    try:
+        return cached_call(
+            'stock_history',
+            {'ts_code': ts_code, 'start_date': start_date, 'end_date': end_date},
+            _fetch
+        )
     except Exception as e:
         print(f"获取股票历史数据失败 {ts_code}: {e}")
         return []
@@ -127,34 +172,31 @@ def calculate_performance_metrics(data):
     if not data:
         return {}
 
-    prices = [d['close'] for d in data]
+    prices = np.asarray([d['close'] for d in data], dtype=np.float64)
 
     if len(prices) < 2:
         return {}
 
     total_return = ((prices[-1] - prices[0]) / prices[0]) * 100
 
-    # 计算最大回撤
-    peak = prices[0]
-    max_drawdown = 0
-    for price in prices:
-        if price > peak:
-            peak = price
-        drawdown = ((peak - price) / peak) * 100
-        if drawdown > max_drawdown:
-            max_drawdown = drawdown
+    # 计算最大回撤（历史峰值用累积最大值一次算出，避免逐日Python循环）
+    peaks = np.maximum.accumulate(prices)
+    max_drawdown = float(((peaks - prices) / peaks).max() * 100)
 
     return {
-        'total_return': round(total_return, 2),
+        'total_return': round(float(total_return), 2),
         'max_drawdown': round(max_drawdown, 2),
-        'start_value': round(prices[0], 2),
-        'end_value': round(prices[-1], 2)
+        'start_value': round(float(prices[0]), 2),
+        'end_value': round(float(prices[-1]), 2)
     }
 
 def main():
     """主函数"""
     print("开始获取A股市场数据...")
 
+    # 日期范围只算一次，所有拉取和汇总共用
+    date_range = get_date_range(365)
+
     # 1. 获取主要指数数据
     indices = {
         '000001.SH': '上证指数',
@@ -163,47 +205,59 @@ def main():
         '000300.SH': '沪深300'
     }
 
-    index_data = {}
-    for code, name in indices.items():
-        print(f"获取 {name} 数据...")
-        data = fetch_index_daily(code, days=365)
-        if data:
-            metrics = calculate_performance_metrics(data)
-            index_data[code] = {
-                'name': name,
-                'code': code,
-                'data': data,
-                'metrics': metrics
-            }
+    # 线程池并发拉取：指数与个股历史的网络等待相互重叠
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        index_futures = {
+            code: executor.submit(fetch_index_daily, code, 365, date_range)
+            for code in indices
+        }
+
+        # 2. 获取热门股票（与指数拉取并行进行）
+        print("获取热门股票列表...")
+        top_stocks = fetch_top_stocks(limit=20)
+
+        # 3. 提交每只股票的历史数据任务（只获取前10只的详细数据）
+        history_futures = [
+            (stock, executor.submit(fetch_stock_history, stock['ts_code'], 365, date_range))
+            for stock in top_stocks[:10]
+        ]
+
+        index_data = {}
+        for code, name in indices.items():
+            print(f"获取 {name} 数据...")
+            data = index_futures[code].result()
+            if data:
+                metrics = calculate_performance_metrics(data)
+                index_data[code] = {
+                    'name': name,
+                    'code': code,
+                    'data': data,
+                    'metrics': metrics
+                }
+
+        stocks_data = {}
+        for stock, future in history_futures:
+            print(f"获取 {stock['name']} 历史数据...")
+            history = future.result()
+            if history:
+                metrics = calculate_performance_metrics(history)
+                stocks_data[stock['ts_code']] = {
+                    'name': stock['name'],
+                    'code': stock['ts_code'],
+                    'industry': stock['industry'],
+                    'market_value': stock['market_value'],
+                    'data': history,
+                    'metrics': metrics
+                }
 
     # 保存指数数据
-    with open(os.path.join(OUTPUT_DIR, 'indices.json'), 'w', encoding='utf-8') as f:
-        json.dump(index_data, f, ensure_ascii=False, indent=2)
+    with open(os.path.join(OUTPUT_DIR, 'indices.json'), 'wb') as f:
+        f.write(dumps_json(index_data))
     print(f"指数数据已保存")
 
-    # 2. 获取热门股票
-    print("获取热门股票列表...")
-    top_stocks = fetch_top_stocks(limit=20)
-
-    # 3. 获取每只股票的历史数据
-    stocks_data = {}
-    for stock in top_stocks[:10]:  # 只获取前10只的详细数据
-        print(f"获取 {stock['name']} 历史数据...")
-        history = fetch_stock_history(stock['ts_code'], days=365)
-        if history:
-            metrics = calculate_performance_metrics(history)
-            stocks_data[stock['ts_code']] = {
-                'name': stock['name'],
-                'code': stock['ts_code'],
-                'industry': stock['industry'],
-                'market_value': stock['market_value'],
-                'data': history,
-                'metrics': metrics
-            }
-
     # 保存股票数据
-    with open(os.path.join(OUTPUT_DIR, 'stocks.json'), 'w', encoding='utf-8') as f:
-        json.dump(stocks_data, f, ensure_ascii=False, indent=2)
+    with open(os.path.join(OUTPUT_DIR, 'stocks.json'), 'wb') as f:
+        f.write(dumps_json(stocks_data))
     print(f"股票数据已保存")
 
     # 4. 生成汇总信息
@@ -211,11 +265,11 @@ def main():
         'last_update': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
         'indices_count': len(index_data),
         'stocks_count': len(stocks_data),
-        'trading_period': f"{get_date_range(365)[0]} - {get_date_range(365)[1]}"
+        'trading_period': f"{date_range[0]} - {date_range[1]}"
     }
 
-    with open(os.path.join(OUTPUT_DIR, 'summary.json'), 'w', encoding='utf-8') as f:
-        json.dump(summary, f, ensure_ascii=False, indent=2)
+    with open(os.path.join(OUTPUT_DIR, 'summary.json'), 'wb') as f:
+        f.write(dumps_json(summary))
     print(f"汇总信息已保存")
 
     print("\n数据获取完成!")
@@ -2,21 +2,25 @@
 A股价格数据持久化管理
 从2024年9月开始记录所有A股的日线数据
 """
-import os
 import json
-import tushare as ts
+import numpy as np
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from itertools import batched
 from typing import Dict, List, Optional
 from pathlib import Path
 from dotenv import load_dotenv
 import time
 
-load_dotenv()
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from _tushare_client import get_pro
 
-# 配置
-TUSHARE_API_KEY = os.getenv("TUSHARE_API_KEY")
-ts.set_token(TUSHARE_API_KEY)
-pro = ts.pro_api()
+load_dotenv()
 
 # 数据目录
 DATA_DIR = Path(__file__).parent.parent / "data" / "daily_prices"
@@ -29,9 +33,29 @@ START_DATE = "20240901"
 class PriceDataManager:
     """价格数据管理器"""
 
-    def __init__(self, data_dir: Path = DATA_DIR):
+    def __init__(self, data_dir: Path = DATA_DIR, pro_api=None):
         self.data_dir = data_dir
         self.data_dir.mkdir(parents=True, exist_ok=True)
+        # 共享的pro_api句柄（默认进程级单例，复用keep-alive连接）
+        self.pro = pro_api if pro_api is not None else get_pro()
+        # 交易日历（升序），首次用到时拉取一次
+        self._trade_days: Optional[List[str]] = None
+
+    def _get_trade_days(self) -> List[str]:
+        """获取START_DATE至今的交易日列表（进程内只请求一次）"""
+        if self._trade_days is None:
+            try:
+                cal = self.pro.trade_cal(
+                    exchange='SSE',
+                    is_open='1',
+                    start_date=START_DATE,
+                    end_date=datetime.now().strftime('%Y%m%d')
+                )
+                self._trade_days = sorted(cal['cal_date'].tolist())
+            except Exception as e:
+                print(f"获取交易日历失败: {e}")
+                self._trade_days = []
+        return self._trade_days
 
     def get_stock_file_path(self, ts_code: str) -> Path:
         """获取股票数据文件路径"""
@@ -42,8 +66,9 @@ class PriceDataManager:
         file_path = self.get_stock_file_path(ts_code)
 
         if file_path.exists():
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with open(file_path, 'rb') as f:
+                raw = f.read()
+            return orjson.loads(raw) if orjson is not None else json.loads(raw)
         else:
             return {
                 "Meta Data": {
@@ -55,14 +80,23 @@ class PriceDataManager:
             }
 
     def save_stock_data(self, ts_code: str, data: Dict):
-        """保存股票数据"""
+        """保存股票数据（紧凑格式：较indent=4体积减少约1/3，序列化更快；
+        优先orjson，未安装回退标准库）"""
         file_path = self.get_stock_file_path(ts_code)
 
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
+        if orjson is not None:
+            payload = orjson.dumps(data)
+        else:
+            payload = json.dumps(
+                data, ensure_ascii=False, separators=(',', ':')
+            ).encode('utf-8')
+
+        with open(file_path, 'wb') as f:
+            f.write(payload)
 
     def fetch_and_save_stock_data(self, ts_code: str, start_date: str = START_DATE,
-                                   end_date: Optional[str] = None) -> bool:
+                                   end_date: Optional[str] = None,
+                                   stock_data: Optional[Dict] = None) -> bool:
         """
         从Tushare获取并保存股票数据
 
@@ -70,6 +104,8 @@ class PriceDataManager:
             ts_code: 股票代码
             start_date: 开始日期 YYYYMMDD
             end_date: 结束日期 YYYYMMDD，默认为今天
+            stock_data: 已加载的现有数据，传入则不再重复读盘
+                （update_stock_data 判断更新区间时已经加载过一次）
 
         Returns:
             bool: 是否成功
@@ -79,33 +115,44 @@ class PriceDataManager:
 
         try:
             # 获取日线数据
-            df = pro.daily(
+            # fields限定服务端只返回用到的列，减少传输和DataFrame构造开销
+            df = self.pro.daily(
                 ts_code=ts_code,
                 start_date=start_date,
-                end_date=end_date
+                end_date=end_date,
+                fields='trade_date,open,high,low,close,vol'
             )
 
             if df.empty:
                 print(f"  {ts_code}: 无数据")
                 return False
 
-            # 加载现有数据
-            stock_data = self.load_stock_data(ts_code)
+            # 加载现有数据（调用方已加载则直接复用）
+            if stock_data is None:
+                stock_data = self.load_stock_data(ts_code)
 
             # 转换为目标格式
             time_series = stock_data["Time Series (Daily)"]
 
-            for _, row in df.iterrows():
-                date_str = row['trade_date']
+            # 数值->字符串转换整列向量化完成，循环内只剩纯dict写入
+            ohlc_strs = np.char.mod(
+                '%.4f',
+                df[['open', 'high', 'low', 'close']].to_numpy(dtype=np.float64)
+            ).tolist()
+            # 手股数转换（*100）也整列完成
+            vol_strs = (df['vol'].fillna(0) * 100).astype('int64').astype(str).tolist()
+
+            for date_str, (o, h, l, c), vol in zip(df['trade_date'].tolist(),
+                                                   ohlc_strs, vol_strs):
                 # 转换为 YYYY-MM-DD 格式
                 date_formatted = f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:]}"
 
                 time_series[date_formatted] = {
-                    "1. open": f"{float(row['open']):.4f}",
-                    "2. high": f"{float(row['high']):.4f}",
-                    "3. low": f"{float(row['low']):.4f}",
-                    "4. close": f"{float(row['close']):.4f}",
-                    "5. volume": str(int(row['vol'] * 100)) if row['vol'] else "0"  # 转换为股数
+                    "1. open": o,
+                    "2. high": h,
+                    "3. low": l,
+                    "4. close": c,
+                    "5. volume": vol  # 已转换为股数
                 }
 
             # 更新元数据
@@ -131,6 +178,17 @@ class PriceDataManager:
         Returns:
             bool: 是否成功
         """
+        # 快速路径：文件在最后一个交易日之后已刷新过，
+        # 不解析JSON也不发请求（周末/节假日整批跳过）
+        trade_days = self._get_trade_days()
+        if trade_days:
+            file_path = self.get_stock_file_path(ts_code)
+            if file_path.exists():
+                mtime_date = datetime.fromtimestamp(
+                    file_path.stat().st_mtime).strftime('%Y%m%d')
+                if mtime_date > trade_days[-1]:
+                    return True
+
         # 加载现有数据
         stock_data = self.load_stock_data(ts_code)
         time_series = stock_data["Time Series (Daily)"]
@@ -152,13 +210,23 @@ class PriceDataManager:
         if start_date > end_date:
             return True
 
-        return self.fetch_and_save_stock_data(ts_code, start_date, end_date)
+        # 对齐到下一个交易日：周末/节假日的区间直接跳过，不发必然为空的请求
+        trade_days = self._get_trade_days()
+        if trade_days:
+            i = bisect_left(trade_days, start_date)
+            if i >= len(trade_days) or trade_days[i] > end_date:
+                return True  # 区间内无交易日
+            start_date = trade_days[i]
+
+        # 把已加载的数据传下去，避免fetch_and_save_stock_data再读一次盘
+        return self.fetch_and_save_stock_data(ts_code, start_date, end_date,
+                                              stock_data=stock_data)
 
     def get_all_stock_list(self) -> List[str]:
         """获取所有A股股票列表"""
         try:
             # 获取所有上市股票
-            df = pro.stock_basic(
+            df = self.pro.stock_basic(
                 exchange='',
                 list_status='L',
                 fields='ts_code,symbol,name,area,industry,list_date'
@@ -172,13 +240,15 @@ class PriceDataManager:
             print(f"获取股票列表失败: {e}")
             return []
 
-    def initialize_all_stocks(self, batch_size: int = 50, delay: float = 0.5):
+    def initialize_all_stocks(self, batch_size: int = 50, delay: float = 0.5,
+                              max_workers: int = 8):
         """
         初始化所有A股的历史数据
 
         Args:
             batch_size: 每批处理的股票数量
-            delay: 每次请求之间的延迟（秒），避免超过API限制
+            delay: 每次请求提交之间的延迟（秒），控制对API的请求速率
+            max_workers: 并发线程数，网络等待/JSON写盘相互重叠
         """
         print("=" * 70)
         print("开始初始化所有A股价格数据")
@@ -196,24 +266,33 @@ class PriceDataManager:
         success_count = 0
         fail_count = 0
 
-        # 分批处理
-        for i in range(0, total, batch_size):
-            batch = stock_list[i:i + batch_size]
-            batch_num = i // batch_size + 1
-            total_batches = (total + batch_size - 1) // batch_size
-
-            print(f"\n处理第 {batch_num}/{total_batches} 批 ({len(batch)} 只股票)...")
-
-            for ts_code in batch:
-                if self.fetch_and_save_stock_data(ts_code):
-                    success_count += 1
-                else:
-                    fail_count += 1
-
-                # 延迟避免超限
-                time.sleep(delay)
+        # 分批处理（batched按需切片，不做中间列表拷贝）。
+        # 线程池并发：按delay的节奏提交任务（请求速率与原来一致），
+        # 但各请求的网络等待和写盘相互重叠；每只股票写各自的文件，无共享状态
+        total_batches = (total + batch_size - 1) // batch_size
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for batch_num, batch in enumerate(batched(stock_list, batch_size), 1):
+                print(f"\n处理第 {batch_num}/{total_batches} 批 ({len(batch)} 只股票)...")
+
+                futures = []
+                for ts_code in batch:
+                    futures.append(
+                        executor.submit(self.fetch_and_save_stock_data, ts_code))
+                    # 延迟避免超限（控制提交即控制请求速率）
+                    time.sleep(delay)
+
+                for future in futures:
+                    try:
+                        ok = future.result()
+                    except Exception as e:
+                        print(f"  任务异常: {e}")
+                        ok = False
+                    if ok:
+                        success_count += 1
+                    else:
+                        fail_count += 1
 
-            print(f"批次完成: 成功 {success_count}, 失败 {fail_count}")
+                print(f"批次完成: 成功 {success_count}, 失败 {fail_count}")
 
         print("\n" + "=" * 70)
         print(f"初始化完成！")
@@ -222,6 +301,77 @@ class PriceDataManager:
         print(f"失败: {fail_count}")
         print("=" * 70)
 
+    def update_all_stocks_by_date(self, start_date: Optional[str] = None,
+                                  end_date: Optional[str] = None,
+                                  delay: float = 0.3):
+        """
+        按交易日批量更新：每个交易日一次 pro.daily(trade_date=...) 调用
+        覆盖全市场，API调用次数从 股票数 降为 交易日数
+
+        Args:
+            start_date: 开始日期 YYYYMMDD，默认最近7天
+            end_date: 结束日期 YYYYMMDD，默认今天
+            delay: 每次请求之间的延迟（秒）
+        """
+        if end_date is None:
+            end_date = datetime.now().strftime('%Y%m%d')
+        if start_date is None:
+            start_date = (datetime.now() - timedelta(days=7)).strftime('%Y%m%d')
+
+        print("=" * 70)
+        print(f"按交易日批量更新: {start_date} - {end_date}")
+        print("=" * 70)
+
+        # 获取区间内的交易日
+        try:
+            cal = self.pro.trade_cal(exchange='SSE', start_date=start_date, end_date=end_date)
+            trade_dates = sorted(cal[cal['is_open'] == 1]['cal_date'].tolist())
+        except Exception as e:
+            print(f"获取交易日历失败: {e}")
+            return
+
+        if not trade_dates:
+            print("区间内无交易日")
+            return
+
+        # 逐日拉取全市场行情，按股票归集
+        per_stock: Dict[str, Dict] = {}
+        fmt = "{:.4f}".format
+
+        for trade_date in trade_dates:
+            try:
+                df = self.pro.daily(trade_date=trade_date,
+                               fields='ts_code,trade_date,open,high,low,close,vol')
+            except Exception as e:
+                print(f"  {trade_date}: 获取失败 - {e}")
+                continue
+
+            for row in df.to_dict('records'):
+                date_str = row['trade_date']
+                date_formatted = f"{date_str[:4]}-{date_str[4:6]}-{date_str[6:]}"
+                per_stock.setdefault(row['ts_code'], {})[date_formatted] = {
+                    "1. open": fmt(float(row['open'])),
+                    "2. high": fmt(float(row['high'])),
+                    "3. low": fmt(float(row['low'])),
+                    "4. close": fmt(float(row['close'])),
+                    "5. volume": str(int(row['vol'] * 100)) if row['vol'] else "0"
+                }
+
+            print(f"  {trade_date}: {len(df)} 条记录")
+            time.sleep(delay)
+
+        # 每只股票只读写一次文件
+        refreshed = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        for ts_code, bars in per_stock.items():
+            stock_data = self.load_stock_data(ts_code)
+            stock_data["Time Series (Daily)"].update(bars)
+            stock_data["Meta Data"]["2. Last Refreshed"] = refreshed
+            self.save_stock_data(ts_code, stock_data)
+
+        print("\n" + "=" * 70)
+        print(f"更新完成: {len(trade_dates)} 个交易日, {len(per_stock)} 只股票")
+        print("=" * 70)
+
     def update_all_stocks(self, batch_size: int = 100, delay: float = 0.3):
         """
         更新所有已存在的股票数据
@@ -248,12 +398,9 @@ class PriceDataManager:
         fail_count = 0
         skip_count = 0
 
-        # 分批处理
-        for i in range(0, total, batch_size):
-            batch = existing_files[i:i + batch_size]
-            batch_num = i // batch_size + 1
-            total_batches = (total + batch_size - 1) // batch_size
-
+        # 分批处理（batched按需切片，不做中间列表拷贝）
+        total_batches = (total + batch_size - 1) // batch_size
+        for batch_num, batch in enumerate(batched(existing_files, batch_size), 1):
             print(f"\n处理第 {batch_num}/{total_batches} 批 ({len(batch)} 个文件)...")
 
             for file_path in batch:
@@ -293,6 +440,8 @@ def main():
         print("使用方法:")
         print("  python scripts/price_data_manager.py init     # 初始化所有A股数据")
         print("  python scripts/price_data_manager.py update   # 更新所有A股数据")
+        print("  python scripts/price_data_manager.py update-bydate [开始日期] [结束日期]")
+        print("                                                # 按交易日批量更新（API调用少）")
         print("  python scripts/price_data_manager.py test     # 测试单只股票")
         return
 
@@ -306,6 +455,12 @@ def main():
         # 更新所有股票数据
         manager.update_all_stocks(batch_size=100, delay=0.3)
 
+    elif command == "update-bydate":
+        # 按交易日批量更新
+        start_date = sys.argv[2] if len(sys.argv) > 2 else None
+        end_date = sys.argv[3] if len(sys.argv) > 3 else None
+        manager.update_all_stocks_by_date(start_date, end_date)
+
     elif command == "test":
         # 测试单只股票
         test_code = "600000.SH"
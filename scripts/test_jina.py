@@ -6,15 +6,18 @@ load_dotenv()
 
 JINA_API_KEY = os.getenv("JINA_API_KEY")
 
+# 模块级Session：连接池复用TCP+TLS连接，循环搜索时免去每次握手
+_session = requests.Session()
+_session.headers.update({
+    "Authorization": f"Bearer {JINA_API_KEY}",
+    "Accept": "application/json",
+})
+
 def jina_search(query: str, top_k: int = 1):
     """Perform a simple Jina web search via API."""
     url = f"https://s.jina.ai/?q={query}&n={top_k}"
-    headers = {
-        "Authorization": f"Bearer {JINA_API_KEY}",
-        "Accept": "application/json",
-    }
 
-    response = requests.get(url, headers=headers)
+    response = _session.get(url)
     response.raise_for_status()
     data = response.json()
 
@@ -5,10 +5,44 @@
 from typing import Optional, Dict, List
 from langchain.tools import tool
 
+# 交易结果输出模板：模块级构建一次，调用时只做一次format
+BUY_OK_TMPL = (
+    "买入成功!\n"
+    "股票: {ts_code}\n"
+    "价格: {price:.2f} RMB\n"
+    "股数: {shares}\n"
+    "成本: {cost:,.2f} RMB\n"
+    "手续费: {commission:.2f} RMB\n"
+    "总计: {total_cost:,.2f} RMB\n"
+    "剩余现金: {cash:,.2f} RMB"
+)
+
+BUY_FAIL_TMPL = (
+    "买入失败!\n"
+    "可能原因: 现金不足\n"
+    "需要: {needed:,.2f} RMB\n"
+    "可用: {cash:,.2f} RMB"
+)
+
+SELL_OK_TMPL = (
+    "卖出成功!\n"
+    "股票: {ts_code}\n"
+    "价格: {price:.2f} RMB\n"
+    "股数: {shares}\n"
+    "收入: {proceeds:,.2f} RMB\n"
+    "手续费: {commission:.2f} RMB\n"
+    "净收入: {net_proceeds:,.2f} RMB\n"
+    "现金: {cash:,.2f} RMB"
+)
+
 
 class TradingToolkit:
     """时间感知的交易工具集"""
 
+    # 跨实例共享的历史价格缓存 {(ts_code, date): 价格数据}
+    # 历史行情不可变，多个agent的工具集可以安全共用同一份
+    _shared_price_cache: Dict[tuple, Dict] = {}
+
     def __init__(self, engine, market_data_provider, current_date: str):
         """
         初始化交易工具集
@@ -21,13 +55,57 @@ class TradingToolkit:
         self.engine = engine
         self.market_data = market_data_provider
         self.current_date = current_date
+        # 展示用的 YYYY-MM-DD，每日只格式化一次
+        self.current_date_formatted = f"{current_date[:4]}-{current_date[4:6]}-{current_date[6:]}"
         self._stock_cache = {}
+        self._tools = None  # get_tools结果缓存
+        self._available_stocks_text = (None, None)  # (代码列表引用, 格式化文本)
 
     def update_current_date(self, new_date: str):
         """更新当前日期"""
         self.current_date = new_date
+        self.current_date_formatted = f"{new_date[:4]}-{new_date[4:6]}-{new_date[6:]}"
         self._stock_cache = {}  # 清空缓存
 
+    def preload_prices(self, price_map: Dict[str, Dict]):
+        """
+        批量预加载当日价格到缓存
+
+        每日开盘时预取一次全量价格后，search_stocks等需要遍历
+        全部股票的工具不再逐只读文件
+
+        Args:
+            price_map: {ts_code: 价格数据}
+        """
+        self._stock_cache.update(price_map)
+
+    def _prefetch_prices(self, ts_codes) -> None:
+        """
+        批量预取一组股票的当日价格
+
+        未命中缓存的代码统一从当日价格表取一次，
+        后续_get_stock_price全部命中缓存，不再逐只读文件
+
+        Args:
+            ts_codes: 股票代码的可迭代对象
+        """
+        missing = [c for c in ts_codes if c not in self._stock_cache]
+        if not missing:
+            return
+
+        price_map = self.market_data.get_local_price_map(self.current_date)
+        for ts_code in missing:
+            price_data = price_map.get(ts_code)
+            if price_data:
+                self._stock_cache[ts_code] = price_data
+
+    @staticmethod
+    def _validate_shares(shares: int) -> Optional[str]:
+        """校验股数（A股按手交易），非法时返回错误信息，合法返回None"""
+        if shares <= 0 or shares % 100 != 0:
+            return f"错误: 股数必须是100的正整数倍，当前: {shares}"
+        return None
+
     def _get_stock_price(self, ts_code: str) -> Optional[Dict]:
         """
         获取股票价格（只能获取当前日期及之前的数据）
@@ -38,8 +116,15 @@ class TradingToolkit:
         if ts_code in self._stock_cache:
             return self._stock_cache[ts_code]
 
-        # 从JSON文件读取
-        price_data = self.market_data.get_stock_price_from_json(ts_code, self.current_date)
+        # 其他工具集实例（或日期回滚前的本实例）可能已读过同一天的数据
+        shared_key = (ts_code, self.current_date)
+        price_data = self._shared_price_cache.get(shared_key)
+
+        if price_data is None:
+            # 从JSON文件读取
+            price_data = self.market_data.get_stock_price_from_json(ts_code, self.current_date)
+            if price_data:
+                self._shared_price_cache[shared_key] = price_data
 
         if price_data:
             self._stock_cache[ts_code] = price_data
@@ -47,7 +132,13 @@ class TradingToolkit:
         return price_data
 
     def get_tools(self):
-        """返回工具列表"""
+        """返回工具列表（首次调用构建，之后直接复用）
+
+        闭包通过self读取当前日期和缓存，日期推进后无需重建；
+        避免每次调用重新执行@tool的签名/docstring解析
+        """
+        if self._tools is not None:
+            return self._tools
 
         @tool
         def get_portfolio_status() -> str:
@@ -57,41 +148,51 @@ class TradingToolkit:
             Returns:
                 str: 投资组合详细信息
             """
-            # 计算持仓市值
+            # 批量预取持仓价格，循环内全部命中缓存
+            self._prefetch_prices(self.engine.portfolio.positions.keys())
+
+            # 单次遍历：同时累计持仓市值和生成持仓明细行
             positions_value = 0
+            holding_lines = []
             for ts_code, position in self.engine.portfolio.positions.items():
                 price_data = self._get_stock_price(ts_code)
-                if price_data:
-                    positions_value += position.shares * price_data['close']
+                if not price_data:
+                    continue
+
+                current_price = price_data['close']
+                position_value = position.shares * current_price
+                positions_value += position_value
+
+                cost_basis = position.shares * position.avg_price
+                profit = position_value - cost_basis
+                profit_rate = profit / cost_basis * 100
+
+                holding_lines.append(f"  {ts_code}: {position.shares}股")
+                holding_lines.append(f"    成本: {position.avg_price:.2f} RMB, 现价: {current_price:.2f} RMB")
+                holding_lines.append(f"    市值: {position_value:,.2f} RMB, 盈亏: {profit:+,.2f} RMB ({profit_rate:+.2f}%)")
 
             total_value = self.engine.portfolio.cash + positions_value
             return_rate = (total_value - self.engine.portfolio.initial_capital) / self.engine.portfolio.initial_capital * 100
 
-            result = f"投资组合状态 (截至{self.current_date[:4]}-{self.current_date[4:6]}-{self.current_date[6:]}):\n"
-            result += f"- 现金: {self.engine.portfolio.cash:,.2f} RMB\n"
-            result += f"- 持仓市值: {positions_value:,.2f} RMB\n"
-            result += f"- 总资产: {total_value:,.2f} RMB\n"
-            result += f"- 收益率: {return_rate:.2f}%\n"
-            result += f"- 持仓数量: {len(self.engine.portfolio.positions)}只\n"
-            result += f"- 交易次数: {len(self.engine.portfolio.trade_history)}次\n\n"
+            # 列表收集+一次join：避免反复拼接字符串的二次复制
+            parts = [
+                f"投资组合状态 (截至{self.current_date_formatted}):",
+                f"- 现金: {self.engine.portfolio.cash:,.2f} RMB",
+                f"- 持仓市值: {positions_value:,.2f} RMB",
+                f"- 总资产: {total_value:,.2f} RMB",
+                f"- 收益率: {return_rate:.2f}%",
+                f"- 持仓数量: {len(self.engine.portfolio.positions)}只",
+                f"- 交易次数: {len(self.engine.portfolio.trade_history)}次",
+                ""
+            ]
 
             if self.engine.portfolio.positions:
-                result += "当前持仓:\n"
-                for ts_code, position in self.engine.portfolio.positions.items():
-                    price_data = self._get_stock_price(ts_code)
-                    if price_data:
-                        current_price = price_data['close']
-                        position_value = position.shares * current_price
-                        profit = position_value - (position.shares * position.avg_price)
-                        profit_rate = profit / (position.shares * position.avg_price) * 100
-
-                        result += f"  {ts_code}: {position.shares}股\n"
-                        result += f"    成本: {position.avg_price:.2f} RMB, 现价: {current_price:.2f} RMB\n"
-                        result += f"    市值: {position_value:,.2f} RMB, 盈亏: {profit:+,.2f} RMB ({profit_rate:+.2f}%)\n"
+                parts.append("当前持仓:")
+                parts.extend(holding_lines)
             else:
-                result += "当前无持仓\n"
+                parts.append("当前无持仓")
 
-            return result
+            return "\n".join(parts) + "\n"
 
         @tool
         def get_available_stocks() -> str:
@@ -108,18 +209,23 @@ class TradingToolkit:
             if not all_stocks:
                 return "错误: 未找到可交易股票"
 
-            result = f"可交易股票总数: {len(all_stocks)}只\n\n"
-            result += "所有股票代码:\n"
+            # 列表未变时（provider按目录mtime返回同一对象）直接复用上次的文本
+            cached_list, cached_text = self._available_stocks_text
+            if cached_list is all_stocks:
+                return cached_text
 
-            # 分行显示，每行10个股票代码
-            for i in range(0, len(all_stocks), 10):
-                batch = all_stocks[i:i+10]
-                result += ", ".join(batch) + "\n"
-
-            result += "\n提示: 使用 search_stocks 工具可以按条件筛选股票（如涨跌幅、价格等）"
-            result += "\n提示: 使用 get_stock_price 工具可以获取具体股票的详细信息"
+            # 分行显示，每行10个股票代码；生成器+一次join，无逐行拼接
+            body = "\n".join(
+                ", ".join(all_stocks[i:i+10])
+                for i in range(0, len(all_stocks), 10)
+            )
 
-            return result
+            text = (f"可交易股票总数: {len(all_stocks)}只\n\n"
+                    f"所有股票代码:\n{body}\n"
+                    "\n提示: 使用 search_stocks 工具可以按条件筛选股票（如涨跌幅、价格等）"
+                    "\n提示: 使用 get_stock_price 工具可以获取具体股票的详细信息")
+            self._available_stocks_text = (all_stocks, text)
+            return text
 
         @tool
         def search_stocks(
@@ -150,6 +256,9 @@ class TradingToolkit:
             if not all_stocks:
                 return "错误: 未找到可交易股票"
 
+            # 全量预取当日价格：一次读价格表，筛选循环内零文件I/O
+            self._prefetch_prices(all_stocks)
+
             # 筛选股票
             matched_stocks = []
             for ts_code in all_stocks:
@@ -191,15 +300,16 @@ class TradingToolkit:
             # 按涨跌幅排序
             matched_stocks.sort(key=lambda x: x['change'], reverse=True)
 
-            result = f"找到 {len(matched_stocks)} 只符合条件的股票:\n\n"
+            # 列表收集+一次join，避免逐行拼接
+            parts = [f"找到 {len(matched_stocks)} 只符合条件的股票:\n"]
 
             for i, stock in enumerate(matched_stocks, 1):
-                result += f"{i}. {stock['ts_code']}\n"
-                result += f"   价格: {stock['close']:.2f} RMB, "
-                result += f"涨跌: {stock['change']:+.2f}%, "
-                result += f"成交量: {stock['volume']:,.0f}\n"
+                parts.append(f"{i}. {stock['ts_code']}")
+                parts.append(f"   价格: {stock['close']:.2f} RMB, "
+                             f"涨跌: {stock['change']:+.2f}%, "
+                             f"成交量: {stock['volume']:,.0f}")
 
-            return result
+            return "\n".join(parts) + "\n"
 
         @tool
         def get_stock_price(ts_code: str) -> str:
@@ -217,16 +327,14 @@ class TradingToolkit:
             if not price_data:
                 return f"错误: 未找到股票 {ts_code} 在日期 {self.current_date} 的价格数据"
 
-            result = f"股票价格 ({self.current_date[:4]}-{self.current_date[4:6]}-{self.current_date[6:]}):\n"
-            result += f"代码: {ts_code}\n"
-            result += f"日期: {price_data['date']}\n"
-            result += f"开盘: {price_data['open']:.2f} RMB\n"
-            result += f"最高: {price_data['high']:.2f} RMB\n"
-            result += f"最低: {price_data['low']:.2f} RMB\n"
-            result += f"收盘: {price_data['close']:.2f} RMB\n"
-            result += f"成交量: {price_data['volume']:,.0f}\n"
-
-            return result
+            return (f"股票价格 ({self.current_date_formatted}):\n"
+                    f"代码: {ts_code}\n"
+                    f"日期: {price_data['date']}\n"
+                    f"开盘: {price_data['open']:.2f} RMB\n"
+                    f"最高: {price_data['high']:.2f} RMB\n"
+                    f"最低: {price_data['low']:.2f} RMB\n"
+                    f"收盘: {price_data['close']:.2f} RMB\n"
+                    f"成交量: {price_data['volume']:,.0f}\n")
 
         @tool
         def buy_stock(ts_code: str, shares: int, reason: str = "") -> str:
@@ -242,8 +350,9 @@ class TradingToolkit:
                 str: 交易结果
             """
             # 验证股数
-            if shares <= 0 or shares % 100 != 0:
-                return f"错误: 股数必须是100的正整数倍，当前: {shares}"
+            error = self._validate_shares(shares)
+            if error:
+                return error
 
             # 获取价格
             price_data = self._get_stock_price(ts_code)
@@ -252,6 +361,11 @@ class TradingToolkit:
 
             price = price_data['close']
 
+            # 成本和手续费只算一次，成功/失败分支共用
+            cost = price * shares
+            commission = self.engine.calculate_commission(cost, is_sell=False)
+            total_cost = cost + commission
+
             # 执行买入
             success = self.engine.buy(
                 date=self.current_date,
@@ -263,24 +377,15 @@ class TradingToolkit:
             )
 
             if success:
-                cost = price * shares
-                commission = self.engine.calculate_commission(cost, is_sell=False)
-                total_cost = cost + commission
-
-                return (f"买入成功!\n"
-                       f"股票: {ts_code}\n"
-                       f"价格: {price:.2f} RMB\n"
-                       f"股数: {shares}\n"
-                       f"成本: {cost:,.2f} RMB\n"
-                       f"手续费: {commission:.2f} RMB\n"
-                       f"总计: {total_cost:,.2f} RMB\n"
-                       f"剩余现金: {self.engine.portfolio.cash:,.2f} RMB")
+                return BUY_OK_TMPL.format(
+                    ts_code=ts_code, price=price, shares=shares,
+                    cost=cost, commission=commission, total_cost=total_cost,
+                    cash=self.engine.portfolio.cash
+                )
             else:
-                needed = price * shares + self.engine.calculate_commission(price * shares, is_sell=False)
-                return (f"买入失败!\n"
-                       f"可能原因: 现金不足\n"
-                       f"需要: {needed:,.2f} RMB\n"
-                       f"可用: {self.engine.portfolio.cash:,.2f} RMB")
+                return BUY_FAIL_TMPL.format(
+                    needed=total_cost, cash=self.engine.portfolio.cash
+                )
 
         @tool
         def sell_stock(ts_code: str, shares: int, reason: str = "") -> str:
@@ -296,8 +401,9 @@ class TradingToolkit:
                 str: 交易结果
             """
             # 验证股数
-            if shares <= 0 or shares % 100 != 0:
-                return f"错误: 股数必须是100的正整数倍，当前: {shares}"
+            error = self._validate_shares(shares)
+            if error:
+                return error
 
             # 检查持仓
             if ts_code not in self.engine.portfolio.positions:
@@ -307,7 +413,7 @@ class TradingToolkit:
             if position.shares < shares:
                 return f"错误: 持仓不足，持有{position.shares}股，尝试卖出{shares}股"
 
-            # 获取当前价格
+            # 获取当前价格（当日无行情说明停牌/缺数据，拒绝按过期价格成交）
             price_data = self._get_stock_price(ts_code)
             if not price_data:
                 return f"错误: 无法获取股票价格"
@@ -329,21 +435,21 @@ class TradingToolkit:
                 commission = self.engine.calculate_commission(proceeds, is_sell=True)
                 net_proceeds = proceeds - commission
 
-                return (f"卖出成功!\n"
-                       f"股票: {ts_code}\n"
-                       f"价格: {price:.2f} RMB\n"
-                       f"股数: {shares}\n"
-                       f"收入: {proceeds:,.2f} RMB\n"
-                       f"手续费: {commission:.2f} RMB\n"
-                       f"净收入: {net_proceeds:,.2f} RMB\n"
-                       f"现金: {self.engine.portfolio.cash:,.2f} RMB")
+                return SELL_OK_TMPL.format(
+                    ts_code=ts_code, price=price, shares=shares,
+                    proceeds=proceeds, commission=commission,
+                    net_proceeds=net_proceeds,
+                    cash=self.engine.portfolio.cash
+                )
             else:
                 return "卖出失败!"
 
-        return [
+        self._tools = [
             get_portfolio_status,
             get_available_stocks,
+            search_stocks,
             get_stock_price,
             buy_stock,
             sell_stock
         ]
+        return self._tools